@@ -26,7 +26,51 @@ def create_app(config_name=None):
     ma.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
 
-    from app.routes import auth, users, devices, doors, groups, access_control, access_logs
+    from app.utils.acl_index import AclIndex
+    from app.utils.acl_events import AclEventNotifier
+    from app.utils.access_log_tail import AccessLogTail
+    from app.utils.access_decisions import AccessDecisionCache
+    from app.utils.cache import LRUCache
+    from app.utils.throttle import DeniedAttemptThrottle
+    from app.utils.password_hashing import PasswordHasher
+    from app.utils.metrics import LatencyRecorder
+    app.extensions['acl_index'] = AclIndex(max_age=app.config['ACL_INDEX_MAX_AGE'])
+    app.extensions['acl_events'] = AclEventNotifier()
+    app.extensions['access_log_tail'] = AccessLogTail(maxlen=app.config['ACCESS_LOG_TAIL_SIZE'])
+    app.extensions['access_decisions'] = AccessDecisionCache(
+        maxsize=app.config['ACCESS_DECISION_CACHE_SIZE'],
+        ttl=app.config['ACCESS_DECISION_CACHE_TTL']
+    )
+    app.extensions['denied_throttle'] = DeniedAttemptThrottle(
+        limit=app.config['THROTTLE_DENIED_LIMIT'],
+        window=app.config['THROTTLE_DENIED_WINDOW'],
+        max_keys=app.config['THROTTLE_MAX_KEYS']
+    )
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config['PASSWORD_HASH_METHOD'],
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+        timeout=app.config['PASSWORD_HASH_TIMEOUT']
+    )
+    app.extensions['login_latency'] = LatencyRecorder()
+    app.extensions['public_key_cache'] = LRUCache(maxsize=app.config['PUBLIC_KEY_CACHE_SIZE'])
+    app.extensions['log_values'] = LRUCache(maxsize=app.config['ACCESS_LOG_VALUE_CACHE_SIZE'])
+    app.extensions['log_value_codes'] = LRUCache(maxsize=app.config['ACCESS_LOG_VALUE_CACHE_SIZE'])
+    app.extensions['log_count_cache'] = LRUCache(
+        maxsize=app.config['LOG_COUNT_CACHE_SIZE'],
+        ttl=app.config['LOG_COUNT_CACHE_TTL']
+    )
+
+    if app.config['ACCESS_LOG_WRITE_BEHIND']:
+        from app.utils.access_log_writer import AccessLogWriter
+        app.extensions['access_log_writer'] = AccessLogWriter(
+            app,
+            batch_size=app.config['ACCESS_LOG_BATCH_SIZE'],
+            flush_interval_ms=app.config['ACCESS_LOG_FLUSH_INTERVAL_MS'],
+            max_queue=app.config['ACCESS_LOG_QUEUE_SIZE']
+        )
+
+    from app.routes import auth, users, devices, doors, groups, access_control, access_logs, metrics
 
     app.register_blueprint(auth.bp, url_prefix='/api/auth')
     app.register_blueprint(users.bp, url_prefix='/api/users')
@@ -35,17 +79,34 @@ def create_app(config_name=None):
     app.register_blueprint(groups.bp, url_prefix='/api/groups')
     app.register_blueprint(access_control.bp, url_prefix='/api/doors')  # Nested under /api/doors
     app.register_blueprint(access_logs.bp, url_prefix='/api/access-logs')
+    app.register_blueprint(metrics.bp, url_prefix='/api/metrics')
+
+    from app.commands import register_commands
+    register_commands(app)
 
     @app.route('/health')
     def health_check():
         return {'status': 'healthy', 'service': 'Aditus Backend'}, 200
 
     with app.app_context():
-        from app.models import User, Device, Door, Group, AccessLog, PairingSession
+        from app.models import (
+            User, Device, Door, Group, AccessLog, AccessLogValue, AccessLogArchive, AccessLogRollup,
+            AccessLogIdempotencyKey, PairingSession, EffectiveDoorAccess, DoorAclEntry, DoorAclChange,
+            AclVersion
+        )
 
         db.create_all()
 
-        from app.utils.db_init import create_admin_user
+        from app.utils.db_init import (
+            create_admin_user, sync_effective_access, ensure_indexes, migrate_access_logs
+        )
+        migrate_access_logs()
+        ensure_indexes()
         create_admin_user()
+        sync_effective_access()
+
+    if app.config['RETENTION_INTERVAL_MINUTES'] > 0 and not app.config['TESTING']:
+        from app.utils.retention import start_retention_thread
+        start_retention_thread(app)
 
     return app
\ No newline at end of file
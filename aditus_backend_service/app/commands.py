@@ -0,0 +1,86 @@
+import sys
+import click
+from flask import Flask
+from app import db
+
+
+def register_commands(app: Flask):
+    """Register maintenance commands on the flask CLI"""
+
+    @app.cli.command('check-log-plans')
+    @click.option('--verbose', is_flag=True, help='Print the plan of every query, not only failures')
+    def check_log_plans(verbose):
+        """
+        Fail if any access log query shape scans access_logs or sorts in a temp B-tree
+        Run against a database created by this version (SQLite only)
+        """
+        if db.engine.dialect.name != 'sqlite':
+            click.echo('EXPLAIN QUERY PLAN checks only run on SQLite')
+            sys.exit(2)
+
+        from app.utils.query_plans import check_access_log_plans
+
+        failures = 0
+        for name, steps, problems in check_access_log_plans():
+            if problems:
+                failures += 1
+
+            if problems or verbose:
+                click.echo(f"{'FAIL' if problems else 'ok'}  {name}")
+                for step in steps:
+                    click.echo(f'      {step}')
+
+        if failures:
+            click.echo(f'✗ {failures} access log queries need a better index')
+            sys.exit(1)
+
+        click.echo('✓ All access log queries use an index for filtering and ordering')
+
+    @app.cli.command('archive-logs')
+    def archive_logs():
+        """
+        Move access logs older than ACCESS_LOG_HOT_MONTHS into monthly compressed archives
+        Safe to run repeatedly (e.g. from a daily cron job)
+        """
+        from app.utils.access_log_archive import archive_access_logs, hot_boundary
+
+        moved = archive_access_logs()
+
+        for month, rows in moved:
+            click.echo(f'✓ {month:%Y-%m}: {rows} access logs archived')
+
+        click.echo(f'✓ Access logs before {hot_boundary():%Y-%m-%d} are archived')
+
+    @app.cli.command('rollup-logs')
+    @click.option('--since', help='Rebuild buckets from this date (ISO format); default: all of access_logs')
+    def rollup_logs(since):
+        """
+        Recount the access statistics rollups from access_logs
+        Backfills history logged before the rollups existed; safe to run repeatedly
+        """
+        from datetime import datetime
+        from app.models import AccessLog
+        from app.utils.access_stats import rebuild_access_stats
+
+        if since:
+            since = datetime.fromisoformat(since)
+        else:
+            since = db.session.query(db.func.min(AccessLog.timestamp)).scalar()
+
+            if since is None:
+                click.echo('✓ No access logs to roll up')
+                return
+
+        start, counted = rebuild_access_stats(since)
+        click.echo(f'✓ Access statistics rebuilt from {start:%Y-%m-%d} ({counted} access logs counted)')
+
+    @app.cli.command('prune-data')
+    def prune_data():
+        """
+        Delete rows older than their retention policy, in small chunks
+        Safe to run while the service is up (e.g. from a daily cron job)
+        """
+        from app.utils.retention import run_retention
+
+        for name, removed, seconds in run_retention():
+            click.echo(f'✓ {name}: {removed} rows removed in {seconds:.1f}s')
@@ -29,6 +29,74 @@ class Config:
 
     ESP32_API_KEY = os.getenv('ESP32_API_KEY', 'esp32-dev-key-change-in-production')
 
+    # In-memory ACL index: seconds before a full reload (picks up other workers' changes)
+    ACL_INDEX_MAX_AGE = int(os.getenv('ACL_INDEX_MAX_AGE', 30))
+
+    # Access decision cache: (user, door) decisions kept in memory, seconds before they expire
+    ACCESS_DECISION_CACHE_SIZE = int(os.getenv('ACCESS_DECISION_CACHE_SIZE', 4096))
+    ACCESS_DECISION_CACHE_TTL = int(os.getenv('ACCESS_DECISION_CACHE_TTL', 60))
+
+    # Parsed device public keys kept in memory for server-side signature checks
+    PUBLIC_KEY_CACHE_SIZE = int(os.getenv('PUBLIC_KEY_CACHE_SIZE', 1024))
+
+    # Password hashing runs in a process pool of PASSWORD_HASH_WORKERS (0: on the request thread);
+    # beyond PASSWORD_HASH_MAX_PENDING concurrent hashes requests get 503 with Retry-After.
+    # Hashes made with another PASSWORD_HASH_METHOD (werkzeug format) are upgraded on login
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 16))
+    PASSWORD_HASH_TIMEOUT = int(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', 1))
+
+    # Denied attempt throttling: a (door, user, device) with THROTTLE_DENIED_LIMIT denials in
+    # THROTTLE_DENIED_WINDOW seconds is refused until they age out (limit 0 disables it)
+    THROTTLE_DENIED_LIMIT = int(os.getenv('THROTTLE_DENIED_LIMIT', 10))
+    THROTTLE_DENIED_WINDOW = int(os.getenv('THROTTLE_DENIED_WINDOW', 60))
+    THROTTLE_MAX_KEYS = int(os.getenv('THROTTLE_MAX_KEYS', 10000))
+
+    # Access log actions, failure reasons and device info strings cached in memory by their code
+    ACCESS_LOG_VALUE_CACHE_SIZE = int(os.getenv('ACCESS_LOG_VALUE_CACHE_SIZE', 10000))
+
+    # Access log totals with total=estimate: cached counts kept in memory, seconds they stay valid
+    LOG_COUNT_CACHE_SIZE = int(os.getenv('LOG_COUNT_CACHE_SIZE', 1024))
+    LOG_COUNT_CACHE_TTL = int(os.getenv('LOG_COUNT_CACHE_TTL', 60))
+
+    # Access log archival: months kept in access_logs before moving to compressed archives,
+    # and where archives are written (defaults to <instance folder>/access_log_archives)
+    ACCESS_LOG_HOT_MONTHS = int(os.getenv('ACCESS_LOG_HOT_MONTHS', 6))
+    ACCESS_LOG_ARCHIVE_DIR = os.getenv('ACCESS_LOG_ARCHIVE_DIR')
+
+    # ACL event streams: seconds between keepalives / checks for other workers' changes
+    ACL_EVENTS_POLL_INTERVAL = int(os.getenv('ACL_EVENTS_POLL_INTERVAL', 15))
+
+    # Live access log stream: recent logs kept in memory per worker for resuming streams,
+    # and seconds between keepalives
+    ACCESS_LOG_TAIL_SIZE = int(os.getenv('ACCESS_LOG_TAIL_SIZE', 1000))
+    ACCESS_LOG_STREAM_KEEPALIVE = int(os.getenv('ACCESS_LOG_STREAM_KEEPALIVE', 15))
+
+    # Write-behind access log ingestion: queue ESP32 logs and insert them in batches of
+    # ACCESS_LOG_BATCH_SIZE rows or every ACCESS_LOG_FLUSH_INTERVAL_MS, whichever comes first
+    ACCESS_LOG_WRITE_BEHIND = os.getenv('ACCESS_LOG_WRITE_BEHIND', 'false').lower() == 'true'
+    ACCESS_LOG_BATCH_SIZE = int(os.getenv('ACCESS_LOG_BATCH_SIZE', 200))
+    ACCESS_LOG_FLUSH_INTERVAL_MS = int(os.getenv('ACCESS_LOG_FLUSH_INTERVAL_MS', 200))
+    ACCESS_LOG_QUEUE_SIZE = int(os.getenv('ACCESS_LOG_QUEUE_SIZE', 10000))
+
+    # Most events a door may upload in one POST /api/access-logs/batch request
+    ACCESS_LOG_BATCH_MAX_EVENTS = int(os.getenv('ACCESS_LOG_BATCH_MAX_EVENTS', 500))
+
+    # Retention (0 keeps rows forever): access logs and their archives, pairing sessions
+    # after they expire, batch upload idempotency keys, superseded door ACL journal entries
+    ACCESS_LOG_RETENTION_DAYS = int(os.getenv('ACCESS_LOG_RETENTION_DAYS', 400))
+    PAIRING_SESSION_RETENTION_MINUTES = int(os.getenv('PAIRING_SESSION_RETENTION_MINUTES', 60))
+    IDEMPOTENCY_KEY_RETENTION_DAYS = int(os.getenv('IDEMPOTENCY_KEY_RETENTION_DAYS', 30))
+    DOOR_ACL_CHANGE_RETENTION_DAYS = int(os.getenv('DOOR_ACL_CHANGE_RETENTION_DAYS', 30))
+
+    # Retention runs delete at most RETENTION_CHUNK_SIZE rows per transaction and pause
+    # between chunks; RETENTION_INTERVAL_MINUTES > 0 also runs them in a background thread
+    RETENTION_CHUNK_SIZE = int(os.getenv('RETENTION_CHUNK_SIZE', 1000))
+    RETENTION_CHUNK_PAUSE_MS = int(os.getenv('RETENTION_CHUNK_PAUSE_MS', 100))
+    RETENTION_INTERVAL_MINUTES = int(os.getenv('RETENTION_INTERVAL_MINUTES', 0))
+
 
 class DevelopmentConfig(Config):
     """Development configuration"""
@@ -3,7 +3,14 @@ from .device import Device
 from .group import Group, group_door_access, group_door_exceptions
 from .door import Door
 from .access_log import AccessLog
+from .access_log_value import AccessLogValue
+from .access_log_archive import AccessLogArchive
+from .access_log_rollup import AccessLogRollup
+from .access_log_idempotency import AccessLogIdempotencyKey
 from .pairing_session import PairingSession
+from .effective_door_access import EffectiveDoorAccess
+from .door_acl import DoorAclEntry, DoorAclChange
+from .acl_version import AclVersion
 
 __all__ = [
     'User',
@@ -11,7 +18,15 @@ __all__ = [
     'Group',
     'Door',
     'AccessLog',
+    'AccessLogValue',
+    'AccessLogArchive',
+    'AccessLogRollup',
+    'AccessLogIdempotencyKey',
     'PairingSession',
+    'EffectiveDoorAccess',
+    'DoorAclEntry',
+    'DoorAclChange',
+    'AclVersion',
     'user_groups',
     'user_door_access',
     'user_door_exceptions',
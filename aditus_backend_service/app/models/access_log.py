@@ -2,27 +2,53 @@ from datetime import datetime
 from app import db
 
 
+def _encoded(kind):
+    """Property reading and writing the string behind a dictionary-encoded column"""
+    column = f'{kind}_code'
+
+    def get(self):
+        from app.utils.access_log_values import decode_value
+        return decode_value(getattr(self, column))
+
+    def set(self, value):
+        from app.utils.access_log_values import encode_value
+        setattr(self, column, encode_value(kind, value))
+
+    return property(get, set)
+
+
 class AccessLog(db.Model):
     __tablename__ = 'access_logs'
+    __table_args__ = (
+        # History queries filter on one of these columns and sort by (timestamp, id) desc,
+        # so each filter gets an index that serves both the lookup and the order
+        db.Index('ix_access_logs_user_timestamp', 'user_id', 'timestamp', 'id'),
+        db.Index('ix_access_logs_door_timestamp', 'door_id', 'timestamp', 'id'),
+        db.Index('ix_access_logs_device_timestamp', 'device_id', 'timestamp', 'id'),
+        db.Index('ix_access_logs_success_timestamp', 'success', 'timestamp', 'id'),
+        {'sqlite_autoincrement': True}  # Archived ids must never be handed out again
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
     # Who accessed
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
     # Which door
-    door_id = db.Column(db.Integer, db.ForeignKey('doors.id'), nullable=False, index=True)
+    door_id = db.Column(db.Integer, db.ForeignKey('doors.id'), nullable=False)
 
     # Which device (smartphone) was used
-    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=True, index=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=True)
 
     # Access status
-    action = db.Column(db.String(50), nullable=False)  # 'unlock', 'lock', 'attempt_denied', etc.
+    # action, failure_reason and device_info repeat a handful of strings, so rows store
+    # codes into access_log_values; the properties below read and write the strings
+    action_code = db.Column(db.Integer, db.ForeignKey('access_log_values.id'), nullable=False)
     success = db.Column(db.Boolean, nullable=False)
-    failure_reason = db.Column(db.String(200))  # e.g., 'out_of_range', 'no_permission', etc.
+    failure_reason_code = db.Column(db.Integer, db.ForeignKey('access_log_values.id'))
 
     # Additional metadata
-    device_info = db.Column(db.Text)  # Could store device model, app version, etc.
+    device_info_code = db.Column(db.Integer, db.ForeignKey('access_log_values.id'))
     ip_address = db.Column(db.String(45))  # IPv4 or IPv6
 
     # Timestamp
@@ -33,6 +59,10 @@ class AccessLog(db.Model):
     door = db.relationship('Door', back_populates='access_logs')
     device = db.relationship('Device', back_populates='access_logs')
 
+    action = _encoded('action')  # 'unlock', 'lock', 'attempt_denied', etc.
+    failure_reason = _encoded('failure_reason')  # e.g., 'out_of_range', 'no_permission', etc.
+    device_info = _encoded('device_info')  # Could store device model, app version, etc.
+
     def to_dict(self, include_user_info=True, include_door_info=True, include_device_info=True):
         """Convert access log to dictionary"""
         data = {
@@ -70,10 +100,15 @@ class AccessLog(db.Model):
 
     @staticmethod
     def log_access(user_id, door_id, action, success, device_id=None, failure_reason=None,
-                   device_info=None, ip_address=None):
+                   device_info=None, ip_address=None, timestamp=None):
         """
         Static method to create an access log entry
+        Also counts it in the statistics rollups and publishes it to the live tail,
+        both applied when the session commits
         """
+        from app.utils.access_stats import count_access
+        from app.utils.access_log_tail import tail_access_logs
+
         log = AccessLog(
             user_id=user_id,
             door_id=door_id,
@@ -82,9 +117,17 @@ class AccessLog(db.Model):
             success=success,
             failure_reason=failure_reason,
             device_info=device_info,
-            ip_address=ip_address
+            ip_address=ip_address,
+            timestamp=timestamp or datetime.now()
         )
         db.session.add(log)
+        db.session.flush()  # Assigns the id shown in the live tail
+        count_access(log.timestamp, user_id, door_id, success, failure_reason)
+        tail_access_logs([{
+            'id': log.id, 'user_id': user_id, 'door_id': door_id, 'device_id': device_id, 'action': action,
+            'success': success, 'failure_reason': failure_reason, 'device_info': device_info,
+            'ip_address': ip_address, 'timestamp': log.timestamp
+        }])
         return log
 
     def __repr__(self):
@@ -0,0 +1,38 @@
+from datetime import datetime
+from app import db
+
+
+class AccessLogArchive(db.Model):
+    """
+    Catalog of access log months moved out of access_logs into compressed archive files
+    Maintained by app.utils.access_log_archive
+    """
+    __tablename__ = 'access_log_archives'
+
+    id = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Date, unique=True, nullable=False)  # First day of the month
+
+    # Gzipped NDJSON file inside ACCESS_LOG_ARCHIVE_DIR, newest log first
+    filename = db.Column(db.String(255), nullable=False)
+    row_count = db.Column(db.Integer, default=0, nullable=False)
+
+    # Timestamp range covered by the file, used to prune archives by from/to filters
+    first_timestamp = db.Column(db.DateTime, nullable=False)
+    last_timestamp = db.Column(db.DateTime, nullable=False, index=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now, nullable=False)
+
+    def to_dict(self):
+        """Convert archive to dictionary"""
+        return {
+            'month': self.month.strftime('%Y-%m'),
+            'filename': self.filename,
+            'row_count': self.row_count,
+            'first_timestamp': self.first_timestamp.isoformat(),
+            'last_timestamp': self.last_timestamp.isoformat(),
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+    def __repr__(self):
+        return f'<AccessLogArchive {self.month:%Y-%m} rows={self.row_count}>'
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app import db
+
+
+class AccessLogIdempotencyKey(db.Model):
+    """
+    Idempotency keys of access log events uploaded in batches by doors
+    A key is stored in the same transaction as its log, so a retried upload never
+    creates the log twice. Old keys can be pruned once doors no longer retry them
+    """
+    __tablename__ = 'access_log_idempotency_keys'
+
+    key = db.Column(db.String(128), primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<AccessLogIdempotencyKey {self.key}>'
@@ -0,0 +1,21 @@
+from app import db
+
+
+class AccessLogRollup(db.Model):
+    """
+    Access attempt counts per hour or day, per door, user or failure reason
+    Maintained incrementally by app.utils.access_stats as access logs are written
+    """
+    __tablename__ = 'access_log_rollups'
+
+    period = db.Column(db.String(10), primary_key=True)  # 'hour' or 'day'
+    dimension = db.Column(db.String(20), primary_key=True)  # 'door', 'user' or 'failure_reason'
+    bucket = db.Column(db.DateTime, primary_key=True)  # Start of the hour or day
+    key = db.Column(db.String(200), primary_key=True)  # Door id, user id or failure reason
+
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    granted = db.Column(db.Integer, default=0, nullable=False)
+    denied = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<AccessLogRollup {self.period} {self.dimension}={self.key} {self.bucket} attempts={self.attempts}>'
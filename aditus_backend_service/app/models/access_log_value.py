@@ -0,0 +1,20 @@
+from app import db
+
+
+class AccessLogValue(db.Model):
+    """
+    Dictionary of the repeated strings of access logs (actions, failure reasons, device info)
+    Access logs store the small integer id instead of the string
+    Maintained by app.utils.access_log_values
+    """
+    __tablename__ = 'access_log_values'
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'value', name='uq_access_log_values_kind_value'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'action', 'failure_reason' or 'device_info'
+    value = db.Column(db.Text, nullable=False)
+
+    def __repr__(self):
+        return f'<AccessLogValue {self.id} {self.kind}={self.value!r}>'
@@ -0,0 +1,15 @@
+from app import db
+
+
+class AclVersion(db.Model):
+    """
+    Change counters for permission-dependent data, shared by all worker processes
+    Maintained by app.utils.acl_version on every flush that touches ACL data
+    """
+    __tablename__ = 'acl_versions'
+
+    scope = db.Column(db.String(50), primary_key=True)  # 'global'
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f'<AclVersion {self.scope}={self.version}>'
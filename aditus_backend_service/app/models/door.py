@@ -53,8 +53,42 @@ class Door(db.Model):
     )
     access_logs = db.relationship('AccessLog', back_populates='door', lazy='dynamic')
 
-    def to_dict(self, include_access_info=False):
-        """Convert door to dictionary"""
+    @staticmethod
+    def get_access_counts(door_ids):
+        """
+        Direct and exception user counts of several doors in one aggregated query
+        Returns {door_id: {'direct_users_count': n, 'exception_users_count': n}}
+        """
+        counts = {
+            door_id: {'direct_users_count': 0, 'exception_users_count': 0}
+            for door_id in door_ids
+        }
+
+        if not counts:
+            return counts
+
+        direct = db.select(
+            user_door_access.c.door_id,
+            db.literal('direct_users_count').label('kind'),
+            db.func.count().label('total')
+        ).where(user_door_access.c.door_id.in_(counts)).group_by(user_door_access.c.door_id)
+
+        exceptions = db.select(
+            user_door_exceptions.c.door_id,
+            db.literal('exception_users_count').label('kind'),
+            db.func.count().label('total')
+        ).where(user_door_exceptions.c.door_id.in_(counts)).group_by(user_door_exceptions.c.door_id)
+
+        for door_id, kind, total in db.session.execute(db.union_all(direct, exceptions)):
+            counts[door_id][kind] = total
+
+        return counts
+
+    def to_dict(self, include_access_info=False, counts=None):
+        """
+        Convert door to dictionary
+        List endpoints pass access counts precomputed with get_access_counts
+        """
         data = {
             'id': self.id,
             'name': self.name,
@@ -69,8 +103,11 @@ class Door(db.Model):
         if include_access_info:
             data['groups'] = [{'id': g.id, 'name': g.name} for g in self.groups]
             data['exception_groups'] = [{'id': g.id, 'name': g.name} for g in self.exception_groups]
-            data['direct_users_count'] = self.direct_users.count()
-            data['exception_users_count'] = self.exception_users.count()
+            if counts is None:
+                counts = Door.get_access_counts([self.id])[self.id]
+
+            data['direct_users_count'] = counts['direct_users_count']
+            data['exception_users_count'] = counts['exception_users_count']
 
         return data
 
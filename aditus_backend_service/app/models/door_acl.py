@@ -0,0 +1,44 @@
+from datetime import datetime
+from app import db
+
+
+class DoorAclEntry(db.Model):
+    """
+    Devices currently allowed through a door, as last published to door controllers
+    Derived data: only app.utils.door_acl should write to this table
+    """
+    __tablename__ = 'door_acl_entries'
+
+    door_id = db.Column(db.Integer, db.ForeignKey('doors.id'), primary_key=True)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), primary_key=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # SHA-256 of the device public key (DER SubjectPublicKeyInfo), hex encoded
+    fingerprint = db.Column(db.String(64), nullable=False)
+
+    def __repr__(self):
+        return f'<DoorAclEntry door={self.door_id} device={self.device_id}>'
+
+
+class DoorAclChange(db.Model):
+    """
+    Append-only journal of door ACL additions and removals
+    The id doubles as the monotonically increasing ACL version handed to door controllers
+    """
+    __tablename__ = 'door_acl_changes'
+    __table_args__ = (
+        db.Index('ix_door_acl_changes_door_version', 'door_id', 'id'),
+        {'sqlite_autoincrement': True}  # Versions must never be reused
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    door_id = db.Column(db.Integer, nullable=False)
+    device_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer, nullable=False)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    added = db.Column(db.Boolean, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now, nullable=False)
+
+    def __repr__(self):
+        op = '+' if self.added else '-'
+        return f'<DoorAclChange v{self.id} door={self.door_id} {op}device={self.device_id}>'
@@ -0,0 +1,18 @@
+from app import db
+
+
+class EffectiveDoorAccess(db.Model):
+    """
+    Resolved user-door permissions (exceptions, direct grants and group grants combined)
+    Derived data: only app.utils.acl should write to this table
+    """
+    __tablename__ = 'effective_door_access'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    door_id = db.Column(db.Integer, db.ForeignKey('doors.id'), primary_key=True, index=True)
+
+    # How access was obtained: 'direct_access' or 'group_access'
+    source = db.Column(db.String(20), nullable=False)
+
+    def __repr__(self):
+        return f'<EffectiveDoorAccess user={self.user_id} door={self.door_id} source={self.source}>'
@@ -40,16 +40,50 @@ class Group(db.Model):
         lazy='dynamic'
     )
 
-    def to_dict(self, include_members=False, include_doors=False):
-        """Convert group to dictionary"""
+    @staticmethod
+    def get_counts(group_ids):
+        """
+        Member and door counts of several groups in one aggregated query
+        Returns {group_id: {'member_count': n, 'door_count': n}}
+        """
+        counts = {group_id: {'member_count': 0, 'door_count': 0} for group_id in group_ids}
+
+        if not counts:
+            return counts
+
+        members = db.select(
+            user_groups.c.group_id,
+            db.literal('member_count').label('kind'),
+            db.func.count().label('total')
+        ).where(user_groups.c.group_id.in_(counts)).group_by(user_groups.c.group_id)
+
+        doors = db.select(
+            group_door_access.c.group_id,
+            db.literal('door_count').label('kind'),
+            db.func.count().label('total')
+        ).where(group_door_access.c.group_id.in_(counts)).group_by(group_door_access.c.group_id)
+
+        for group_id, kind, total in db.session.execute(db.union_all(members, doors)):
+            counts[group_id][kind] = total
+
+        return counts
+
+    def to_dict(self, include_members=False, include_doors=False, counts=None):
+        """
+        Convert group to dictionary
+        List endpoints pass counts precomputed with get_counts
+        """
+        if counts is None:
+            counts = Group.get_counts([self.id])[self.id]
+
         data = {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'member_count': self.members.count(),
-            'door_count': self.doors.count()
+            'member_count': counts['member_count'],
+            'door_count': counts['door_count']
         }
 
         if include_members:
@@ -1,5 +1,4 @@
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
 
 user_groups = db.Table('user_groups',
@@ -57,12 +56,25 @@ class User(db.Model):
     access_logs = db.relationship('AccessLog', back_populates='user', lazy='dynamic')
 
     def set_password(self, password):
-        """Hash and set the user's password"""
-        self.password_hash = generate_password_hash(password)
+        """
+        Hash and set the user's password (in the password hashing pool)
+        Raises PasswordHashingBusy when the pool is full
+        """
+        from app.utils.password_hashing import get_password_hasher
+        self.password_hash = get_password_hasher().hash(password)
 
     def check_password(self, password):
-        """Verify the user's password"""
-        return check_password_hash(self.password_hash, password)
+        """
+        Verify the user's password (in the password hashing pool)
+        Raises PasswordHashingBusy when the pool is full
+        """
+        from app.utils.password_hashing import get_password_hasher
+        return get_password_hasher().verify(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        """True if the stored hash does not use the configured PASSWORD_HASH_METHOD"""
+        from app.utils.password_hashing import get_password_hasher
+        return get_password_hasher().needs_rehash(self.password_hash)
 
     def is_admin(self):
         """Check if user is an admin"""
@@ -73,20 +85,16 @@ class User(db.Model):
         Check if user has access to a specific door
         Priority: Exceptions > Direct Access > Group Access
         """
-        # First check exceptions (highest priority - deny)
-        if door in self.door_exceptions:
-            return False
+        return self.get_door_access_type(door) is not None
 
-        # Check direct access
-        if door in self.direct_door_access:
-            return True
-
-        # Check group access
-        for group in self.groups:
-            if door in group.doors and group not in door.exception_groups:
-                return True
-
-        return False
+    def get_door_access_type(self, door):
+        """
+        Get how the user can access a door: 'direct_access', 'group_access' or None
+        Answered from the access decision cache in front of the in-memory ACL index
+        """
+        from app.utils.access_decisions import decide_access
+        allowed, reason = decide_access(self.id, door.id)
+        return reason if allowed else None
 
     def to_dict(self, include_sensitive=False):
         """Convert user to dictionary"""
@@ -100,60 +108,9 @@ class User(db.Model):
         }
 
         if include_sensitive:
-            # Groups the user belongs to
-            data['groups'] = [
-                {'id': g.id, 'name': g.name}
-                for g in self.groups
-            ]
-
-            # Devices owned by the user
-            data['devices'] = [
-                {'id': d.id, 'name': d.name, 'public_key': d.public_key}
-                for d in self.devices
-            ]
-
-            # Doors with direct access
-            data['direct_door_access'] = [
-                {'id': d.id, 'name': d.name, 'location': d.location}
-                for d in self.direct_door_access
-            ]
-
-            # Doors the user is explicitly denied access to
-            data['door_exceptions'] = [
-                {'id': d.id, 'name': d.name, 'location': d.location}
-                for d in self.door_exceptions
-            ]
-
-            # Doors accessible via group membership
-            group_doors = set()
-            for group in self.groups:
-                for door in group.doors:
-                    # Only include if the group is not in the door's exception list
-                    if group not in door.exception_groups:
-                        group_doors.add(door)
-
-            data['group_door_access'] = [
-                {'id': d.id, 'name': d.name, 'location': d.location}
-                for d in group_doors
-            ]
-
-            # Doors that user's groups are denied access to
-            group_exception_doors = set()
-            for group in self.groups:
-                for door in group.exception_doors:
-                    group_exception_doors.add(door)
-
-            data['group_door_exceptions'] = [
-                {'id': d.id, 'name': d.name, 'location': d.location}
-                for d in group_exception_doors
-            ]
-
-            # Total counts
-            data['device_count'] = self.devices.count()
-            data['group_count'] = self.groups.count()
-            data['total_door_access_count'] = (
-                self.direct_door_access.count() + len(group_doors)
-            )
+            # Groups, devices, door access and counts, from a fixed number of queries
+            from app.utils.user_profile import get_profile_details
+            data.update(get_profile_details(self.id))
 
         return data
     
@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required
 from app import db
 from app.models import User, Door, Group
 from app.utils.decorators import admin_required
+from app.utils.acl import refresh_effective_access
+from app.utils.acl_version import acl_etag, not_modified, with_etag
 
 bp = Blueprint('access_control', __name__)
 
@@ -13,20 +15,26 @@ bp = Blueprint('access_control', __name__)
 def get_access_rules(door_id):
     """
     Get all access rules for a door (admin only)
+    Supports If-None-Match (ETag changes with the global ACL version)
     """
+    etag = acl_etag('door-access', door_id)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     door = Door.query.get(door_id)
 
     if not door:
         return jsonify({'error': 'Door not found'}), 404
 
-    return jsonify({
+    return with_etag((jsonify({
         'door_id': door.id,
         'door_name': door.name,
         'allowed_groups': [{'id': g.id, 'name': g.name} for g in door.groups],
         'allowed_users': [{'id': u.id, 'email': u.email} for u in door.direct_users],
         'exception_groups': [{'id': g.id, 'name': g.name} for g in door.exception_groups],
         'exception_users': [{'id': u.id, 'email': u.email} for u in door.exception_users]
-    }), 200
+    }), 200), etag)
 
 
 # Grant Access - Users
@@ -64,6 +72,7 @@ def grant_user_access(door_id):
 
     # Add access
     door.direct_users.append(user)
+    refresh_effective_access(user_ids=[user.id], door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -95,6 +104,7 @@ def revoke_user_access(door_id, user_id):
 
     # Remove access
     door.direct_users.remove(user)
+    refresh_effective_access(user_ids=[user.id], door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -138,6 +148,7 @@ def grant_group_access(door_id):
 
     # Add access
     door.groups.append(group)
+    refresh_effective_access(door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -169,6 +180,7 @@ def revoke_group_access(door_id, group_id):
 
     # Remove access
     door.groups.remove(group)
+    refresh_effective_access(door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -212,6 +224,7 @@ def add_user_exception(door_id):
 
     # Add exception
     door.exception_users.append(user)
+    refresh_effective_access(user_ids=[user.id], door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -243,6 +256,7 @@ def remove_user_exception(door_id, user_id):
 
     # Remove exception
     door.exception_users.remove(user)
+    refresh_effective_access(user_ids=[user.id], door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -286,6 +300,7 @@ def add_group_exception(door_id):
 
     # Add exception
     door.exception_groups.append(group)
+    refresh_effective_access(door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
@@ -317,6 +332,7 @@ def remove_group_exception(door_id, group_id):
 
     # Remove exception
     door.exception_groups.remove(group)
+    refresh_effective_access(door_ids=[door.id])
     db.session.commit()
 
     return jsonify({
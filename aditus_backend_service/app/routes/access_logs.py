@@ -1,8 +1,17 @@
-from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import User, Door, Device, AccessLog
+from app.models import User, Door, Device, AccessLogArchive
 from app.utils.decorators import admin_required, esp32_auth_required
+from app.utils.access_log_queries import parse_log_filters, get_log_page, iter_logs
+from app.utils.access_log_export import EXPORT_FORMATS, stream_export
+from app.utils.access_log_archive import hot_boundary
+from app.utils.access_stats import PERIODS, DIMENSIONS, query_access_stats
+from app.utils.access_log_writer import submit_access_log
+from app.utils.access_log_batch import ingest_access_log_batch
+from app.utils.access_log_tail import get_access_log_tail
+from app.utils.sse import format_sse, sse_comment
+from app.utils.throttle import get_denied_attempt_throttle, throttle_key, throttled_response
 
 bp = Blueprint('access_logs', __name__)
 
@@ -16,66 +25,188 @@ def list_access_logs():
     Query params:
     - limit: number of results (default 50, max 500)
     - offset: offset for pagination (default 0)
+    - cursor: keyset pagination instead of offset (empty for the first page,
+      then the returned next_cursor)
+    - total: 'exact' (default), 'estimate' (cached for a short while) or 'none'
     - success: filter by success status (true/false)
     - user_id: filter by user
     - door_id: filter by door
     - device_id: filter by device
-    - from: filter by start date (ISO format)
+    - from: filter by start date (ISO format); archived months are only read once a
+      page reaches past the hot rows
     - to: filter by end date (ISO format)
     """
-    limit = min(int(request.args.get('limit', 50)), 500)
-    offset = int(request.args.get('offset', 0))
-    success_filter = request.args.get('success')
-    user_id = request.args.get('user_id')
-    door_id = request.args.get('door_id')
-    device_id = request.args.get('device_id')
-    from_date = request.args.get('from')
-    to_date = request.args.get('to')
+    try:
+        filters = parse_log_filters(request.args)
+        page = get_log_page(filters, args=request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    query = AccessLog.query
+    return jsonify(page), 200
 
-    if success_filter is not None:
-        success_bool = success_filter.lower() == 'true'
-        query = query.filter_by(success=success_bool)
 
-    if user_id:
-        query = query.filter_by(user_id=int(user_id))
+@bp.route('/export', methods=['GET'])
+@jwt_required()
+@admin_required
+def export_access_logs():
+    """
+    Stream every access log matching the filters as a download (admin only)
+    Query params:
+    - format: 'ndjson' (default) or 'csv'
+    - success, user_id, door_id, device_id, from, to: same filters as list_access_logs
+    Rows are read in keyset pages, each in its own short read transaction, so memory use does
+    not grow with the export and a slow download never blocks writers
+    """
+    export_format = request.args.get('format', 'ndjson')
+
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': 'format must be one of: ' + ', '.join(EXPORT_FORMATS)}), 400
+
+    try:
+        filters = parse_log_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    filename = f'access_logs_{datetime.now():%Y%m%d_%H%M%S}.{extension}'
+
+    return Response(
+        stream_with_context(stream_export(iter_logs(filters), export_format)),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
-    if door_id:
-        query = query.filter_by(door_id=int(door_id))
 
-    if device_id:
-        query = query.filter_by(device_id=int(device_id))
+@bp.route('/stats', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_access_stats():
+    """
+    Access attempt counts from the pre-aggregated rollups (admin only)
+    Query params:
+    - period: 'hour' or 'day' (default)
+    - dimension: 'door' (default), 'user' or 'failure_reason'
+    - key: only this door id, user id or failure reason
+    - from: start date (ISO format, default 7 days ago)
+    - to: end date (ISO format, default now)
+    """
+    period = request.args.get('period', 'day')
+    dimension = request.args.get('dimension', 'door')
+
+    if period not in PERIODS:
+        return jsonify({'error': 'period must be one of: ' + ', '.join(PERIODS)}), 400
 
-    if from_date:
-        from datetime import datetime
-        from_dt = datetime.fromisoformat(from_date.replace('Z', '+00:00'))
-        query = query.filter(AccessLog.timestamp >= from_dt)
+    if dimension not in DIMENSIONS:
+        return jsonify({'error': 'dimension must be one of: ' + ', '.join(DIMENSIONS)}), 400
 
-    if to_date:
-        from datetime import datetime
-        to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
-        query = query.filter(AccessLog.timestamp <= to_dt)
+    try:
+        filters = parse_log_filters(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    query = query.order_by(AccessLog.timestamp.desc())
+    end = filters.get('to') or datetime.now()
+    start = filters.get('from') or end - timedelta(days=7)
 
-    total = query.count()
+    buckets = query_access_stats(period, dimension, start, end, key=request.args.get('key'))
 
-    logs = query.limit(limit).offset(offset).all()
+    # Totals per key over the whole range
+    totals = {}
+    for bucket in buckets:
+        total = totals.setdefault(bucket['key'], {
+            'key': bucket['key'], 'attempts': 0, 'granted': 0, 'denied': 0
+        })
+        for name in ('attempts', 'granted', 'denied'):
+            total[name] += bucket[name]
 
     return jsonify({
-        'logs': [log.to_dict() for log in logs],
-        'total': total,
-        'limit': limit,
-        'offset': offset
+        'period': period,
+        'dimension': dimension,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'buckets': buckets,
+        'totals': sorted(totals.values(), key=lambda total: total['attempts'], reverse=True)
     }), 200
 
 
+@bp.route('/archives', methods=['GET'])
+@jwt_required()
+@admin_required
+def list_archives():
+    """
+    List months moved out of the hot access log table into compressed archives (admin only)
+    """
+    archives = AccessLogArchive.query.order_by(AccessLogArchive.month.desc()).all()
+
+    return jsonify({
+        'archives': [archive.to_dict() for archive in archives],
+        'hot_since': hot_boundary().isoformat()
+    }), 200
+
+
+@bp.route('/stream', methods=['GET'])
+@jwt_required()
+@admin_required
+def stream_access_logs():
+    """
+    Server-sent events stream of access logs as they are written (admin only)
+    Served from this worker's in-memory ring buffer; the database is never queried
+    Query params:
+    - door_id: only logs of this door
+    - since: sequence number to resume after (or the Last-Event-ID header);
+      0 replays the whole buffer, default is new logs only
+    A 'reset' event is sent when logs after since are no longer buffered
+    """
+    tail = get_access_log_tail()
+    keepalive = current_app.config['ACCESS_LOG_STREAM_KEEPALIVE']
+
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    door_id = request.args.get('door_id')
+
+    try:
+        last_seq = int(since) if since else tail.seq
+        door_id = int(door_id) if door_id else None
+    except ValueError:
+        return jsonify({'error': 'since and door_id must be integers'}), 400
+
+    def generate():
+        nonlocal last_seq
+
+        yield f'retry: {keepalive * 1000}\n\n'
+
+        while True:
+            entries, complete = tail.since(last_seq)
+
+            if not complete:
+                oldest = entries[0][0] if entries else tail.seq + 1
+                yield format_sse({'oldest_seq': oldest}, event='reset')
+
+            for seq, entry in entries:
+                last_seq = seq
+                if door_id is None or entry['door_id'] == door_id:
+                    yield format_sse(entry, event='access-log', event_id=seq)
+
+            if not complete and not entries:
+                last_seq = tail.seq
+
+            if tail.wait(last_seq, timeout=keepalive) == last_seq:
+                yield sse_comment('keepalive')
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @bp.route('/my-logs', methods=['GET'])
 @jwt_required()
 def get_my_logs():
     """
     Get current user's access logs
+    Accepts the same paging and filter params as list_access_logs
     """
     current_user_id = get_jwt_identity()
     user = User.query.get(int(current_user_id))
@@ -83,20 +214,14 @@ def get_my_logs():
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    limit = min(int(request.args.get('limit', 50)), 500)
-    offset = int(request.args.get('offset', 0))
+    try:
+        filters = parse_log_filters(request.args)
+        filters['user_id'] = user.id
+        page = get_log_page(filters, args=request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
-    query = AccessLog.query.filter_by(user_id=user.id).order_by(AccessLog.timestamp.desc())
-
-    total = query.count()
-    logs = query.limit(limit).offset(offset).all()
-
-    return jsonify({
-        'logs': [log.to_dict() for log in logs],
-        'total': total,
-        'limit': limit,
-        'offset': offset
-    }), 200
+    return jsonify(page), 200
 
 
 @bp.route('/doors/<int:door_id>', methods=['GET'])
@@ -105,26 +230,23 @@ def get_my_logs():
 def get_door_logs(door_id):
     """
     Get access logs for specific door (admin only)
+    Accepts the same paging and filter params as list_access_logs
     """
     door = Door.query.get(door_id)
 
     if not door:
         return jsonify({'error': 'Door not found'}), 404
 
-    limit = min(int(request.args.get('limit', 50)), 500)
-    offset = int(request.args.get('offset', 0))
-
-    query = AccessLog.query.filter_by(door_id=door_id).order_by(AccessLog.timestamp.desc())
-
-    total = query.count()
-    logs = query.limit(limit).offset(offset).all()
+    try:
+        filters = parse_log_filters(request.args)
+        filters['door_id'] = door_id
+        page = get_log_page(filters, args=request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     return jsonify({
         'door': door.to_dict(),
-        'logs': [log.to_dict() for log in logs],
-        'total': total,
-        'limit': limit,
-        'offset': offset
+        **page
     }), 200
 
 
@@ -134,6 +256,7 @@ def get_user_logs(user_id):
     """
     Get access logs for specific user
     Admin or self only
+    Accepts the same paging and filter params as list_access_logs
     """
     current_user_id = get_jwt_identity()
     current_user = User.query.get(int(current_user_id))
@@ -146,20 +269,16 @@ def get_user_logs(user_id):
     if not current_user.is_admin() and user.id != current_user.id:
         return jsonify({'error': 'Access denied'}), 403
 
-    limit = min(int(request.args.get('limit', 50)), 500)
-    offset = int(request.args.get('offset', 0))
-
-    query = AccessLog.query.filter_by(user_id=user_id).order_by(AccessLog.timestamp.desc())
-
-    total = query.count()
-    logs = query.limit(limit).offset(offset).all()
+    try:
+        filters = parse_log_filters(request.args)
+        filters['user_id'] = user_id
+        page = get_log_page(filters, args=request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     return jsonify({
         'user': user.to_dict(),
-        'logs': [log.to_dict() for log in logs],
-        'total': total,
-        'limit': limit,
-        'offset': offset
+        **page
     }), 200
 
 
@@ -169,6 +288,7 @@ def get_device_logs(device_id):
     """
     Get access logs for specific device
     Admin or owner only
+    Accepts the same paging and filter params as list_access_logs
     """
     current_user_id = get_jwt_identity()
     current_user = User.query.get(int(current_user_id))
@@ -181,20 +301,16 @@ def get_device_logs(device_id):
     if not current_user.is_admin() and device.owner_id != current_user.id:
         return jsonify({'error': 'Access denied'}), 403
 
-    limit = min(int(request.args.get('limit', 50)), 500)
-    offset = int(request.args.get('offset', 0))
-
-    query = AccessLog.query.filter_by(device_id=device_id).order_by(AccessLog.timestamp.desc())
-
-    total = query.count()
-    logs = query.limit(limit).offset(offset).all()
+    try:
+        filters = parse_log_filters(request.args)
+        filters['device_id'] = device_id
+        page = get_log_page(filters, args=request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
 
     return jsonify({
         'device': device.to_dict(),
-        'logs': [log.to_dict() for log in logs],
-        'total': total,
-        'limit': limit,
-        'offset': offset
+        **page
     }), 200
 
 
@@ -203,6 +319,8 @@ def get_device_logs(device_id):
 def create_access_log():
     """
     Create access log entry (ESP32 endpoint)
+    When ACCESS_LOG_WRITE_BEHIND queues the log for a batched write, the 201 response
+    has no log (doors only check the status code)
     """
     data = request.get_json()
 
@@ -218,6 +336,22 @@ def create_access_log():
     if user_id is None or door_id is None or success is None:
         return jsonify({'error': 'user_id, door_id, and success are required'}), 400
 
+    # Queued logs skip the column's type check, so "false" would be written as a success
+    if not isinstance(success, bool):
+        return jsonify({'error': 'success must be a boolean'}), 400
+
+    # Doors stuck reporting denials are refused before any database work; successful
+    # logs are always stored, and suppressed denials are counted in the throttle metrics
+    throttle = get_denied_attempt_throttle()
+    key = throttle_key(door_id, user_id, device_id)
+
+    if not success:
+        retry_after = throttle.retry_after(key)
+
+        if retry_after:
+            throttle.record_suppressed()
+            return throttled_response(retry_after)
+
     user = User.query.get(user_id)
     door = Door.query.get(door_id)
 
@@ -232,7 +366,10 @@ def create_access_log():
         if not device:
             return jsonify({'error': 'Device not found'}), 404
 
-    log = AccessLog.log_access(
+    if not success:
+        throttle.record_denied(key)
+
+    log = submit_access_log(
         user_id=user_id,
         door_id=door_id,
         device_id=device_id,
@@ -243,9 +380,41 @@ def create_access_log():
         ip_address=ip_address
     )
 
-    db.session.commit()
+    # Write-behind mode: the log is queued and written with the next batch
+    if log is None:
+        return jsonify({'message': 'Access log queued'}), 201
 
     return jsonify({
         'message': 'Access log created successfully',
         'log': log.to_dict()
     }), 201
+
+
+@bp.route('/batch', methods=['POST'])
+@esp32_auth_required
+def create_access_log_batch():
+    """
+    Upload buffered access log events in one request (ESP32 endpoint)
+    Body: { events: [{ idempotency_key, user_id, door_id, device_id?, action?, success,
+    failure_reason?, device_info?, ip_address?, timestamp }], api_key }
+    Retrying an upload is safe: events with an already stored idempotency_key are not
+    written again. Invalid events are rejected one by one, the rest are stored together
+    """
+    data = request.get_json()
+    events = data.get('events')
+
+    if not isinstance(events, list) or not events:
+        return jsonify({'error': 'events must be a non-empty array'}), 400
+
+    max_events = current_app.config['ACCESS_LOG_BATCH_MAX_EVENTS']
+    if len(events) > max_events:
+        return jsonify({'error': f'At most {max_events} events per batch'}), 413
+
+    results = ingest_access_log_batch(events)
+
+    return jsonify({
+        'created': sum(1 for result in results if result['status'] == 'created'),
+        'duplicates': sum(1 for result in results if result['status'] == 'duplicate'),
+        'rejected': sum(1 for result in results if result['status'] == 'rejected'),
+        'results': results
+    }), 200
@@ -8,15 +8,19 @@ from flask_jwt_extended import (
 )
 from app import db
 from app.models import User
+from app.utils.metrics import record_latency
+from app.utils.password_hashing import PasswordHashingBusy, hashing_busy_response
 
 bp = Blueprint('auth', __name__)
 
 
 @bp.route('/login', methods=['POST'])
+@record_latency('login_latency')
 def login():
     """
     Login endpoint
     Returns JWT access and refresh tokens
+    Returns 503 with Retry-After when too many passwords are being checked at once
     """
     data = request.get_json()
 
@@ -32,9 +36,22 @@ def login():
     # Find user by email
     user = User.query.filter_by(email=email).first()
 
-    if not user or not user.check_password(password):
+    try:
+        valid = user is not None and user.check_password(password)
+    except PasswordHashingBusy:
+        return hashing_busy_response()
+
+    if not valid:
         return jsonify({'error': 'Invalid email or password'}), 401
 
+    # Upgrade hashes made with older parameters; retried on a later login if the pool is busy
+    try:
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
+    except PasswordHashingBusy:
+        pass
+
     # Create tokens
     access_token = create_access_token(identity=str(user.id))
     refresh_token = create_refresh_token(identity=str(user.id))
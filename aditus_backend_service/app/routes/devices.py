@@ -3,6 +3,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, Device, PairingSession
 from app.utils.decorators import admin_required, esp32_auth_required
+from app.utils.crypto import forget_device_public_key, get_cached_public_key, verify_signature
+from app.utils.door_acl import sync_door_acl, forget_device
 import secrets
 
 bp = Blueprint('devices', __name__)
@@ -41,7 +43,10 @@ def register_device():
     )
 
     db.session.add(device)
+    db.session.flush()
+    sync_door_acl(user_ids=[user.id])
     db.session.commit()
+    forget_device_public_key(device.id)
 
     return jsonify({
         'message': 'Device registered successfully',
@@ -143,8 +148,10 @@ def delete_device(device_id):
     if not current_user.is_admin() and device.owner_id != current_user.id:
         return jsonify({'error': 'Access denied'}), 403
 
+    forget_device(device.id)
     db.session.delete(device)
     db.session.commit()
+    forget_device_public_key(device_id)
 
     return jsonify({'message': 'Device deleted successfully'}), 200
 
@@ -169,6 +176,35 @@ def get_device_public_key(device_id):
     }), 200
 
 
+@bp.route('/<int:device_id>/verify', methods=['POST'])
+@esp32_auth_required
+def verify_device_signature(device_id):
+    """
+    Verify a challenge signature with the device's public key (ESP32 endpoint)
+    Lets the door skip fetching and parsing the PEM key itself
+    """
+    data = request.get_json()
+
+    challenge = data.get('challenge')
+    signature = data.get('signature')
+
+    if not challenge or not signature:
+        return jsonify({'error': 'challenge and signature are required'}), 400
+
+    device = Device.query.get(device_id)
+
+    if not device:
+        return jsonify({'error': 'Device not found'}), 404
+
+    valid = verify_signature(get_cached_public_key(device), str(challenge), signature)
+
+    return jsonify({
+        'device_id': device.id,
+        'user_id': device.owner_id,
+        'valid': valid
+    }), 200
+
+
 @bp.route('/pairing/initiate', methods=['POST'])
 @jwt_required()
 def initiate_pairing():
@@ -242,7 +278,10 @@ def complete_pairing():
     pairing_session.mark_as_used()
 
     db.session.add(device)
+    db.session.flush()
+    sync_door_acl(user_ids=[user.id])
     db.session.commit()
+    forget_device_public_key(device.id)
 
     return jsonify({
         'message': 'Smartwatch paired successfully',
@@ -1,8 +1,17 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, request, jsonify, make_response, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
 from app import db
-from app.models import User, Door
+from app.models import User, Door, Device
 from app.utils.decorators import admin_required, esp32_auth_required
+from app.utils.acl import clear_effective_access, query_doors_with_access
+from app.utils.access_decisions import decide_access
+from app.utils.access_log_writer import submit_access_log
+from app.utils.throttle import get_denied_attempt_throttle, throttle_key, throttled_response
+from app.utils.crypto import get_cached_public_key, verify_signature
+from app.utils.door_acl import build_door_snapshot, get_door_acl_version
+from app.utils.acl_events import get_acl_event_notifier, fetch_door_acl_events, acl_event_payload
+from app.utils.sse import format_sse, sse_comment
+from app.utils.acl_version import acl_etag, not_modified, with_etag
 
 bp = Blueprint('doors', __name__)
 
@@ -55,40 +64,34 @@ def list_doors():
     List all doors with access status for current user
     Query params:
     - include_inactive: 'true' to include inactive doors (admin only)
+    Supports If-None-Match (ETag changes with the global ACL version)
     """
     current_user_id = get_jwt_identity()
+    include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+
+    etag = acl_etag('doors', current_user_id, int(include_inactive))
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     user = User.query.get(int(current_user_id))
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
-
-    if include_inactive and user.role == 'admin':
-        doors = Door.query.all()  # Return ALL doors for admins
-    else:
-        doors = Door.query.filter_by(is_active=True).all()  # Only active for regular users
+    # Return ALL doors for admins, only active for regular users
+    active_only = not (include_inactive and user.role == 'admin')
 
     doors_data = []
-    for door in doors:
+    for door, access_type in query_doors_with_access(user.id, active_only=active_only):
         door_dict = door.to_dict()
-
-        has_access = user.has_access_to_door(door)
-        door_dict['user_has_access'] = has_access
-
-        if has_access:
-            if door in user.direct_door_access:
-                door_dict['access_type'] = 'direct_access'
-            else:
-                door_dict['access_type'] = 'group_access'
-        else:
-            door_dict['access_type'] = 'no_access'
-
+        door_dict['user_has_access'] = access_type is not None
+        door_dict['access_type'] = access_type or 'no_access'
         doors_data.append(door_dict)
 
-    return jsonify({
+    return with_etag((jsonify({
         'doors': doors_data
-    }), 200
+    }), 200), etag)
 
 
 @bp.route('/accessible', methods=['GET'])
@@ -96,30 +99,29 @@ def list_doors():
 def list_accessible_doors():
     """
     List only doors user can access
+    Supports If-None-Match (ETag changes with the global ACL version)
     """
     current_user_id = get_jwt_identity()
+
+    etag = acl_etag('accessible', current_user_id)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     user = User.query.get(int(current_user_id))
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    all_doors = Door.query.filter_by(is_active=True).all()
-    accessible_doors = [door for door in all_doors if user.has_access_to_door(door)]
-
     doors_data = []
-    for door in accessible_doors:
+    for door, access_type in query_doors_with_access(user.id, accessible_only=True):
         door_dict = door.to_dict()
-
-        if door in user.direct_door_access:
-            door_dict['access_type'] = 'direct_access'
-        else:
-            door_dict['access_type'] = 'group_access'
-
+        door_dict['access_type'] = access_type
         doors_data.append(door_dict)
 
-    return jsonify({
+    return with_etag((jsonify({
         'doors': doors_data
-    }), 200
+    }), 200), etag)
 
 
 @bp.route('/<int:door_id>', methods=['GET'])
@@ -138,16 +140,9 @@ def get_door(door_id):
 
     door_dict = door.to_dict(include_access_info=user.is_admin())
 
-    has_access = user.has_access_to_door(door)
-    door_dict['user_has_access'] = has_access
-
-    if has_access:
-        if door in user.direct_door_access:
-            door_dict['access_type'] = 'direct_access'
-        else:
-            door_dict['access_type'] = 'group_access'
-    else:
-        door_dict['access_type'] = 'no_access'
+    access_type = user.get_door_access_type(door)
+    door_dict['user_has_access'] = access_type is not None
+    door_dict['access_type'] = access_type or 'no_access'
 
     return jsonify({
         'door': door_dict
@@ -205,6 +200,7 @@ def delete_door(door_id):
     if not door:
         return jsonify({'error': 'Door not found'}), 404
 
+    clear_effective_access(door_ids=[door.id])
     db.session.delete(door)
     db.session.commit()
 
@@ -226,6 +222,14 @@ def check_access():
     if not user_id or not door_id:
         return jsonify({'error': 'user_id and door_id are required'}), 400
 
+    # Keys with too many recent denials are refused before any database work
+    throttle = get_denied_attempt_throttle()
+    key = throttle_key(door_id, user_id, data.get('device_id'))
+    retry_after = throttle.retry_after(key)
+
+    if retry_after:
+        return throttled_response(retry_after, {'allowed': False, 'reason': 'throttled'})
+
     user = User.query.get(user_id)
     door = Door.query.get(door_id)
 
@@ -242,27 +246,99 @@ def check_access():
         }), 404
 
     if not door.is_active:
+        throttle.record_denied(key)
         return jsonify({
             'allowed': False,
             'reason': 'door_inactive'
         }), 200
 
-    has_permission = user.has_access_to_door(door)
+    allowed, reason = decide_access(user.id, door.id)
+
+    if not allowed:
+        throttle.record_denied(key)
+
+    return jsonify({
+        'allowed': allowed,
+        'reason': reason
+    }), 200
+
 
-    if not has_permission:
+@bp.route('/<int:door_id>/unlock', methods=['POST'])
+@esp32_auth_required
+def unlock_door(door_id):
+    """
+    Verify a signed challenge, check permissions and log the attempt in one call (ESP32 endpoint)
+    Replaces the public-key, check-access and access-log round trips
+    """
+    data = request.get_json()
+
+    device_id = data.get('device_id')
+    challenge = data.get('challenge')
+    signature = data.get('signature')
+
+    if not device_id or not challenge or not signature:
+        return jsonify({'error': 'device_id, challenge and signature are required'}), 400
+
+    throttle = get_denied_attempt_throttle()
+    key = throttle_key(door_id, data.get('user_id'), device_id)
+    retry_after = throttle.retry_after(key)
+
+    if retry_after:
+        return throttled_response(retry_after, {'allowed': False, 'reason': 'throttled'})
+
+    door = Door.query.get(door_id)
+
+    if not door:
         return jsonify({
             'allowed': False,
-            'reason': 'no_permission'
-        }), 200
+            'reason': 'door_not_found'
+        }), 404
+
+    device = Device.query.get(device_id)
 
-    if door in user.direct_door_access:
-        access_reason = 'direct_access'
+    if not device:
+        return jsonify({
+            'allowed': False,
+            'reason': 'device_not_found'
+        }), 404
+
+    user = device.owner
+    claimed_user_id = data.get('user_id')
+
+    # Cheap checks first, signature verification last
+    if not door.is_active:
+        reason = 'door_inactive'
+    elif claimed_user_id is not None and str(claimed_user_id) != str(user.id):
+        reason = 'device_user_mismatch'
     else:
-        access_reason = 'group_access'
+        reason = user.get_door_access_type(door) or 'no_permission'
+
+        if reason != 'no_permission':
+            public_key = get_cached_public_key(device)
+            if not verify_signature(public_key, str(challenge), signature):
+                reason = 'invalid_signature'
+
+    allowed = reason in ('direct_access', 'group_access')
+
+    if not allowed:
+        throttle.record_denied(key)
+
+    submit_access_log(
+        user_id=user.id,
+        door_id=door.id,
+        device_id=device.id,
+        action='unlock',
+        success=allowed,
+        failure_reason=None if allowed else reason,
+        device_info=data.get('device_info'),
+        ip_address=data.get('ip_address')
+    )
 
     return jsonify({
-        'allowed': True,
-        'reason': access_reason
+        'allowed': allowed,
+        'reason': reason,
+        'user_id': user.id,
+        'device_id': device.id
     }), 200
 
 
@@ -300,3 +376,117 @@ def configure_esp32():
         'door_id': door.id,
         'door_name': door.name
     }), 200
+
+
+@bp.route('/acl-snapshot', methods=['POST'])
+@esp32_auth_required
+def get_acl_snapshot():
+    """
+    Download the door's device ACL as a compact binary snapshot (ESP32 endpoint)
+    Door is identified by MAC address; pass since_version to only get changes after it
+    """
+    data = request.get_json()
+
+    mac_address = data.get('mac_address')
+
+    if not mac_address:
+        return jsonify({'error': 'mac_address is required'}), 400
+
+    mac_address = mac_address.upper().strip()
+
+    door = Door.query.filter_by(device_id=mac_address).first()
+
+    if not door:
+        return jsonify({
+            'error': f'No door configured for MAC address {mac_address}'
+        }), 404
+
+    if not door.is_active:
+        return jsonify({
+            'error': 'Door is disabled',
+            'door_id': door.id
+        }), 403
+
+    since_version = data.get('since_version')
+
+    try:
+        since_version = int(since_version) if since_version is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'since_version must be an integer'}), 400
+
+    version, payload = build_door_snapshot(door.id, since_version=since_version)
+
+    response = make_response(payload)
+    response.headers['Content-Type'] = 'application/octet-stream'
+    response.headers['X-ACL-Version'] = str(version)
+    return response
+
+
+@bp.route('/<int:door_id>/acl-events', methods=['GET'])
+def stream_acl_events(door_id):
+    """
+    Server-sent events stream of ACL changes affecting a door
+    Door controllers authenticate with the X-API-Key header and receive every change;
+    apps use their JWT and only receive changes to their own devices (admins get all)
+    Resume with the Last-Event-ID header or ?since=<version>
+    """
+    api_key = request.headers.get('X-API-Key')
+    user_filter = None
+
+    if api_key:
+        if api_key != current_app.config['ESP32_API_KEY']:
+            return jsonify({'error': 'Invalid API key'}), 403
+    else:
+        verify_jwt_in_request()
+        user = User.query.get(int(get_jwt_identity()))
+
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        if not user.is_admin():
+            user_filter = user.id
+
+    door = Door.query.get(door_id)
+
+    if not door:
+        return jsonify({'error': 'Door not found'}), 404
+
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+
+    try:
+        last_version = int(since) if since else get_door_acl_version(door_id)
+    except ValueError:
+        return jsonify({'error': 'since must be an integer'}), 400
+
+    notifier = get_acl_event_notifier()
+    poll_interval = current_app.config['ACL_EVENTS_POLL_INTERVAL']
+
+    def generate():
+        nonlocal last_version
+        generation = notifier.generation
+
+        yield f'retry: {poll_interval * 1000}\n\n'
+
+        while True:
+            changes = fetch_door_acl_events(door_id, last_version, user_id=user_filter)
+
+            # End the read transaction so the stream never pins an old snapshot
+            db.session.rollback()
+
+            for change in changes:
+                last_version = change.id
+                yield format_sse(acl_event_payload(change), event='acl-change', event_id=change.id)
+
+            if changes:
+                continue
+
+            new_generation = notifier.wait(generation, timeout=poll_interval)
+            if new_generation == generation:
+                yield sse_comment('keepalive')
+            generation = new_generation
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
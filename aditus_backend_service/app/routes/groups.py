@@ -3,6 +3,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User, Group
 from app.utils.decorators import admin_required
+from app.utils.acl import refresh_effective_access
 
 bp = Blueprint('groups', __name__)
 
@@ -52,9 +53,10 @@ def list_groups():
     List all groups (admin only)
     """
     groups = Group.query.all()
+    counts = Group.get_counts([group.id for group in groups])
 
     return jsonify({
-        'groups': [group.to_dict() for group in groups]
+        'groups': [group.to_dict(counts=counts[group.id]) for group in groups]
     }), 200
 
 
@@ -71,9 +73,10 @@ def get_my_groups():
         return jsonify({'error': 'User not found'}), 404
 
     groups = user.groups.all()
+    counts = Group.get_counts([group.id for group in groups])
 
     return jsonify({
-        'groups': [group.to_dict() for group in groups]
+        'groups': [group.to_dict(counts=counts[group.id]) for group in groups]
     }), 200
 
 
@@ -152,7 +155,10 @@ def delete_group(group_id):
     if not group:
         return jsonify({'error': 'Group not found'}), 404
 
+    member_ids = [member.id for member in group.members]
+
     db.session.delete(group)
+    refresh_effective_access(user_ids=member_ids)
     db.session.commit()
 
     return jsonify({'message': 'Group deleted successfully'}), 200
@@ -181,6 +187,7 @@ def add_members(group_id):
         return jsonify({'error': 'user_ids array is required'}), 400
 
     added_users = []
+    added_ids = []
     for user_id in user_ids:
         user = User.query.get(user_id)
 
@@ -191,7 +198,9 @@ def add_members(group_id):
         if user not in group.members:
             group.members.append(user)
             added_users.append(user.to_dict())
+            added_ids.append(user.id)
 
+    refresh_effective_access(user_ids=added_ids)
     db.session.commit()
 
     return jsonify({
@@ -221,6 +230,7 @@ def remove_member(group_id, user_id):
     # Check if user is a member
     if user in group.members:
         group.members.remove(user)
+        refresh_effective_access(user_ids=[user.id])
         db.session.commit()
 
         return jsonify({
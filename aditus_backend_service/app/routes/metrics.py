@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required
+from app.utils.decorators import admin_required
+from app.utils.metrics import collect_metrics
+
+bp = Blueprint('metrics', __name__)
+
+
+@bp.route('/', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_metrics():
+    """
+    Get in-memory cache counters (admin only)
+    Counters are per worker process and reset on restart
+    """
+    return jsonify(collect_metrics()), 200
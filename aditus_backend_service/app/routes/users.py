@@ -3,6 +3,9 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models import User
 from app.utils.decorators import admin_required
+from app.utils.acl import clear_effective_access
+from app.utils.acl_version import acl_etag, not_modified, with_etag
+from app.utils.password_hashing import PasswordHashingBusy, hashing_busy_response
 
 bp = Blueprint('users', __name__)
 
@@ -37,7 +40,10 @@ def create_user():
         full_name=full_name,
         role=role
     )
-    user.set_password(password)
+    try:
+        user.set_password(password)
+    except PasswordHashingBusy:
+        return hashing_busy_response()
 
     db.session.add(user)
     db.session.commit()
@@ -66,16 +72,23 @@ def list_users():
 def get_current_user():
     """
     Get current user's information
+    Supports If-None-Match (ETag changes with the global ACL version)
     """
     current_user_id = get_jwt_identity()
+
+    etag = acl_etag('me', current_user_id)
+    cached = not_modified(etag)
+    if cached:
+        return cached
+
     user = User.query.get(int(current_user_id))
 
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    return jsonify({
+    return with_etag((jsonify({
         'user': user.to_dict(include_sensitive=True)
-    }), 200
+    }), 200), etag)
 
 
 @bp.route('/<int:user_id>', methods=['GET'])
@@ -187,6 +200,7 @@ def delete_user(user_id):
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
+    clear_effective_access(user_ids=[user.id])
     db.session.delete(user)
     db.session.commit()
 
@@ -216,12 +230,16 @@ def change_password():
     if not current_password or not new_password:
         return jsonify({'error': 'Current password and new password are required'}), 400
 
-    # Verify current password
-    if not user.check_password(current_password):
-        return jsonify({'error': 'Current password is incorrect'}), 401
+    try:
+        # Verify current password
+        if not user.check_password(current_password):
+            return jsonify({'error': 'Current password is incorrect'}), 401
+
+        # Set new password
+        user.set_password(new_password)
+    except PasswordHashingBusy:
+        return hashing_busy_response()
 
-    # Set new password
-    user.set_password(new_password)
     db.session.commit()
 
     return jsonify({'message': 'Password changed successfully'}), 200
@@ -0,0 +1,76 @@
+import threading
+from flask import current_app
+from app.utils.cache import LRUCache
+
+NO_PERMISSION = 'no_permission'
+
+
+class AccessDecisionCache:
+    """
+    Bounded TTL + LRU cache of (user_id, door_id) -> (allowed, reason)
+    Reason is 'direct_access', 'group_access' or 'no_permission'; whether the door is
+    active is checked by callers on the loaded door, so door edits never touch the cache
+
+    Committed ACL changes evict exactly the pairs they affected (see app.utils.acl);
+    the TTL bounds how long changes committed by other worker processes go unnoticed.
+    A decision never outlives the index snapshot it was read from, so the TTL and the
+    index max age do not add up
+    """
+
+    def __init__(self, maxsize=4096, ttl=60):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def decide(self, user_id, door_id, resolve, fresh_for=None):
+        """
+        Get the cached decision for a pair, calling resolve(user_id, door_id) on a miss
+        fresh_for() gives the seconds the resolved decision stays valid, if less than the TTL
+        """
+        key = (user_id, door_id)
+        decision = self._cache.get(key)
+
+        if decision is not None:
+            return decision
+
+        generation = self._generation
+        access_type = resolve(user_id, door_id)
+        decision = (True, access_type) if access_type else (False, NO_PERMISSION)
+
+        ttl = self._cache.ttl
+        if fresh_for is not None:
+            remaining = fresh_for()
+            if not remaining:
+                return decision
+            ttl = min(ttl, remaining) if ttl else remaining
+
+        # An invalidation that ran while resolving may have made this decision stale
+        with self._lock:
+            if generation == self._generation:
+                self._cache.set(key, decision, ttl=ttl)
+
+        return decision
+
+    def invalidate_pairs(self, pairs):
+        with self._lock:
+            self._generation += 1
+            for pair in pairs:
+                self._cache.pop(pair)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+def get_access_decision_cache():
+    """Get the access decision cache of the current application"""
+    return current_app.extensions['access_decisions']
+
+
+def decide_access(user_id, door_id):
+    """
+    Decide whether a user may open a door, ignoring whether the door is active
+    Returns (allowed, reason) where reason is the access type or 'no_permission'
+    """
+    from app.utils.acl_index import get_acl_index
+    index = get_acl_index()
+    return get_access_decision_cache().decide(user_id, door_id, index.access_type, index.fresh_for)
@@ -0,0 +1,283 @@
+import gzip
+import heapq
+import json
+import os
+from datetime import datetime, date
+from operator import itemgetter
+from flask import current_app
+from sqlalchemy import select, func, tuple_
+from app import db
+from app.models import AccessLog, AccessLogArchive
+
+# Archive files are gzipped NDJSON, one access log per line, newest first:
+#   {"user_id": 1, "door_id": 2, "device_id": 3, "log": <serialized access log>}
+# The raw ids are kept next to the serialized log so filters still work once the
+# referenced user, door or device has been deleted
+
+
+def get_archive_dir():
+    """Directory archive files are written to, created on first use"""
+    path = current_app.config['ACCESS_LOG_ARCHIVE_DIR'] or os.path.join(
+        current_app.instance_path, 'access_log_archives'
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _month_start(moment):
+    return date(moment.year, moment.month, 1)
+
+
+def _next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _as_datetime(day):
+    return datetime(day.year, day.month, day.day)
+
+
+def hot_boundary(now=None, hot_months=None):
+    """First instant kept in access_logs: logs before it are due for archival"""
+    if hot_months is None:
+        hot_months = current_app.config['ACCESS_LOG_HOT_MONTHS']
+
+    now = now or datetime.now()
+    total = now.year * 12 + now.month - 1 - hot_months
+    return datetime(total // 12, total % 12 + 1, 1)
+
+
+def find_archives(filters):
+    """
+    Archived months a query may have to read, newest first
+    Only months entirely outside the from/to range are pruned; callers open the files
+    lazily, once a page reaches past the hot rows
+    """
+    query = AccessLogArchive.query
+
+    if filters.get('from') is not None:
+        query = query.filter(AccessLogArchive.last_timestamp >= filters['from'])
+
+    if filters.get('to') is not None:
+        query = query.filter(AccessLogArchive.first_timestamp <= filters['to'])
+
+    return query.order_by(AccessLogArchive.month.desc()).all()
+
+
+def _read_archive(archive):
+    """Yield ((timestamp, id), record) from an archive file, newest first"""
+    path = os.path.join(get_archive_dir(), archive.filename)
+
+    with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+        for line in archive_file:
+            record = json.loads(line)
+            log = record['log']
+            yield (datetime.fromisoformat(log['timestamp']), log['id']), record
+
+
+def _matches(record, key, filters, after):
+    log = record['log']
+
+    if after is not None and key >= after:
+        return False
+    if filters.get('from') is not None and key[0] < filters['from']:
+        return False
+    if filters.get('to') is not None and key[0] > filters['to']:
+        return False
+    if filters.get('success') is not None and log['success'] != filters['success']:
+        return False
+
+    return all(
+        filters.get(name) is None or record[name] == filters[name]
+        for name in ('user_id', 'door_id', 'device_id')
+    )
+
+
+def iter_archived_logs(archives, filters, after=None):
+    """
+    Yield ((timestamp, id), serialized log) for archived logs matching filters, newest first
+    after: only logs strictly older than this (timestamp, id) position
+    """
+    for archive in archives:
+        # Months are disjoint, so whole files can be skipped once past the cursor
+        if after is not None and archive.first_timestamp > after[0]:
+            continue
+
+        for key, record in _read_archive(archive):
+            if _matches(record, key, filters, after):
+                yield key, record['log']
+
+
+def _covers(archive, filters):
+    """True if every log of the archive matches filters, so row_count is its count"""
+    if any(filters.get(name) is not None for name in ('success', 'user_id', 'door_id', 'device_id')):
+        return False
+    if filters.get('from') is not None and archive.first_timestamp < filters['from']:
+        return False
+    if filters.get('to') is not None and archive.last_timestamp > filters['to']:
+        return False
+    return True
+
+
+def count_archived_logs(archives, filters):
+    """
+    Number of archived logs matching filters
+    Archives entirely inside the filters are counted from the catalog's row_count; other
+    counts read the file and are kept in the log count cache (keyed by the file's version)
+    """
+    cache = current_app.extensions['log_count_cache']
+    total = 0
+
+    for archive in archives:
+        if _covers(archive, filters):
+            total += archive.row_count
+            continue
+
+        key = ('archive', archive.filename, archive.updated_at, tuple(sorted(filters.items())))
+        count = cache.get(key)
+
+        if count is None:
+            count = sum(1 for _ in iter_archived_logs([archive], filters))
+            cache.set(key, count)
+
+        total += count
+
+    return total
+
+
+def _month_condition(start, end, max_id):
+    return db.and_(AccessLog.timestamp >= start, AccessLog.timestamp < end, AccessLog.id <= max_id)
+
+
+def _hot_records(start, end, max_id, chunk_size):
+    """
+    Yield ((timestamp, id), record) for access_logs rows of a month, newest first
+    Rows are read in keyset pages of chunk_size, each in its own short read transaction,
+    so writers are not blocked while the archive file is being written
+    """
+    from app.utils.access_log_queries import LOG_COLUMNS, select_logs, serialize_log_row
+
+    width = len(LOG_COLUMNS)
+    after = None
+
+    while True:
+        stmt = select_logs(_month_condition(start, end, max_id))
+        if after is not None:
+            stmt = stmt.where(tuple_(AccessLog.timestamp, AccessLog.id) < tuple_(*after))
+
+        rows = db.session.execute(
+            stmt.add_columns(AccessLog.user_id, AccessLog.door_id, AccessLog.device_id)
+            .limit(chunk_size)
+        ).all()
+        db.session.rollback()
+
+        for row in rows:
+            user_id, door_id, device_id = row[width:]
+            yield (row.timestamp, row.id), {
+                'user_id': user_id,
+                'door_id': door_id,
+                'device_id': device_id,
+                'log': serialize_log_row(row[:width])
+            }
+
+        if len(rows) < chunk_size:
+            return
+
+        after = (rows[-1].timestamp, rows[-1].id)
+
+
+def archive_month(month, max_id):
+    """
+    Move one month of access_logs rows (up to max_id) into its archive file
+    Rows already archived for that month (late arrivals) are merged into the same file
+    The catalog is committed before the rows are deleted in chunks (retention.prune_rows);
+    until then readers skip the copies found in both places
+    Returns the number of rows moved out of access_logs
+    """
+    from app.utils.retention import prune_rows
+
+    start, end = _as_datetime(month), _as_datetime(_next_month(month))
+    chunk_size = current_app.config['RETENTION_CHUNK_SIZE']
+    archive = AccessLogArchive.query.filter_by(month=month).first()
+    archived_rows = archive.row_count if archive else 0
+
+    filename = f'access_logs_{month:%Y-%m}.ndjson.gz'
+    path = os.path.join(get_archive_dir(), filename)
+    tmp_path = path + '.tmp'
+
+    sources = [_hot_records(start, end, max_id, chunk_size)]
+    if archive:
+        sources.append(_read_archive(archive))
+
+    written = 0
+    first = last = previous = None
+
+    # Write the merged month to a temporary file, then swap it in atomically
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as archive_file:
+        for key, record in heapq.merge(*sources, key=itemgetter(0), reverse=True):
+            if key == previous:
+                continue  # Same log in both sources after an interrupted run
+            previous = key
+
+            archive_file.write(json.dumps(record, separators=(',', ':')) + '\n')
+            written += 1
+            last = last or key[0]
+            first = key[0]
+
+    os.chmod(tmp_path, 0o444)
+    os.replace(tmp_path, path)
+
+    archive = AccessLogArchive.query.filter_by(month=month).first()
+    if not archive:
+        archive = AccessLogArchive(month=month, filename=filename)
+        db.session.add(archive)
+
+    archive.row_count = written
+    archive.first_timestamp = first
+    archive.last_timestamp = last
+    db.session.commit()
+
+    prune_rows(AccessLog, _month_condition(start, end, max_id), chunk_size=chunk_size)
+
+    return written - archived_rows
+
+
+def archive_access_logs(now=None):
+    """
+    Move every month older than ACCESS_LOG_HOT_MONTHS out of access_logs
+    Returns a list of (month, rows moved)
+    """
+    boundary = hot_boundary(now)
+
+    # Rows inserted while archiving get higher ids and are left for the next run
+    oldest, max_id = db.session.execute(
+        select(func.min(AccessLog.timestamp), func.max(AccessLog.id))
+        .where(AccessLog.timestamp < boundary)
+    ).one()
+
+    # Never empty the table: without AUTOINCREMENT (tables created before it was
+    # declared) SQLite would hand out archived ids again
+    newest_id = db.session.execute(select(func.max(AccessLog.id))).scalar()
+    if max_id is not None and max_id == newest_id:
+        max_id -= 1
+
+    if oldest is None or not max_id:
+        return []
+
+    moved = []
+    month = _month_start(oldest)
+
+    while _as_datetime(month) < boundary:
+        has_rows = db.session.execute(
+            select(AccessLog.id).where(
+                AccessLog.timestamp >= _as_datetime(month),
+                AccessLog.timestamp < _as_datetime(_next_month(month)),
+                AccessLog.id <= max_id
+            ).limit(1)
+        ).first()
+
+        if has_rows:
+            moved.append((month, archive_month(month, max_id)))
+
+        month = _next_month(month)
+
+    return moved
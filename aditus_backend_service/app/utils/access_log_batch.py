@@ -0,0 +1,150 @@
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import User, Door, Device, AccessLogIdempotencyKey
+from app.utils.access_log_queries import parse_timestamp
+from app.utils.access_stats import tally_rows, apply_counts
+from app.utils.access_log_tail import insert_and_tail
+
+# Longest idempotency key accepted (size of the key column)
+MAX_KEY_LENGTH = 128
+
+
+def _parse_event(event, index):
+    """
+    Access log row of one uploaded event
+    Raises ValueError with a message naming the offending field
+    """
+    if not isinstance(event, dict):
+        raise ValueError(f'events[{index}] must be an object')
+
+    key = event.get('idempotency_key')
+    if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+        raise ValueError(f'idempotency_key must be a string of 1 to {MAX_KEY_LENGTH} characters')
+
+    for name in ('user_id', 'door_id', 'success', 'timestamp'):
+        if event.get(name) is None:
+            raise ValueError(f'{name} is required')
+
+    row = {'key': key}
+
+    for name in ('user_id', 'door_id', 'device_id'):
+        value = event.get(name)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise ValueError(f'{name} must be an integer')
+        row[name] = value
+
+    if not isinstance(event['success'], bool):
+        raise ValueError('success must be a boolean')
+
+    # Strings are stored as given (dictionary-encoded), so other JSON types are refused
+    for name in ('action', 'failure_reason', 'device_info', 'ip_address'):
+        if event.get(name) is not None and not isinstance(event[name], str):
+            raise ValueError(f'{name} must be a string')
+
+    if not isinstance(event['timestamp'], str):
+        raise ValueError('timestamp must be an ISO date')
+
+    row.update(
+        action=event.get('action') or 'unlock',
+        success=event['success'],
+        failure_reason=event.get('failure_reason'),
+        device_info=event.get('device_info'),
+        ip_address=event.get('ip_address'),
+        timestamp=parse_timestamp(event['timestamp'], 'timestamp')
+    )
+    return row
+
+
+def _existing_ids(model, ids):
+    """Subset of ids present in model's table, in one IN query"""
+    if not ids:
+        return set()
+    return set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+
+def _existing_keys(keys):
+    """Subset of idempotency keys already stored, in one IN query"""
+    if not keys:
+        return set()
+    return set(db.session.execute(
+        select(AccessLogIdempotencyKey.key).where(AccessLogIdempotencyKey.key.in_(keys))
+    ).scalars())
+
+
+def _insert_batch(rows):
+    """
+    Insert logs, their idempotency keys and rollup counts with one executemany each
+    The logs are published to the live tail once the transaction commits
+    """
+    log_rows = [{name: value for name, value in row.items() if name != 'key'} for row in rows]
+
+    insert_and_tail(log_rows)
+    db.session.execute(insert(AccessLogIdempotencyKey.__table__), [{'key': row['key']} for row in rows])
+    apply_counts(tally_rows(log_rows))
+
+
+def ingest_access_log_batch(events):
+    """
+    Store a batch of access log events uploaded by a door, in a single transaction
+    Every event needs an idempotency_key: events whose key was already stored (a retried
+    upload) are reported as duplicates and not written again
+    Referenced users, doors and devices are checked with one IN query per table;
+    events that are malformed or reference missing ones are rejected individually
+    Returns one result per event, in order:
+    {'idempotency_key', 'status': 'created' | 'duplicate' | 'rejected', 'error' (rejected only)}
+    """
+    results = [None] * len(events)
+    parsed = []
+
+    for index, event in enumerate(events):
+        try:
+            parsed.append((index, _parse_event(event, index)))
+        except ValueError as e:
+            key = event.get('idempotency_key') if isinstance(event, dict) else None
+            results[index] = {'idempotency_key': key, 'status': 'rejected', 'error': str(e)}
+
+    user_ids = _existing_ids(User, {row['user_id'] for _, row in parsed})
+    door_ids = _existing_ids(Door, {row['door_id'] for _, row in parsed})
+    device_ids = _existing_ids(Device, {row['device_id'] for _, row in parsed} - {None})
+
+    valid = []
+    for index, row in parsed:
+        if row['user_id'] not in user_ids:
+            error = 'User not found'
+        elif row['door_id'] not in door_ids:
+            error = 'Door not found'
+        elif row['device_id'] is not None and row['device_id'] not in device_ids:
+            error = 'Device not found'
+        else:
+            valid.append((index, row))
+            continue
+
+        results[index] = {'idempotency_key': row['key'], 'status': 'rejected', 'error': error}
+
+    # A concurrent upload of the same events can store a key between the lookup and the
+    # insert; the unique key then aborts the transaction and a second pass reports duplicates
+    for attempt in range(2):
+        stored = _existing_keys({row['key'] for _, row in valid})
+        new = []
+
+        for index, row in valid:
+            if row['key'] in stored:
+                status = 'duplicate'
+            else:
+                # Repeated within the batch: the first occurrence wins
+                stored.add(row['key'])
+                new.append(row)
+                status = 'created'
+
+            results[index] = {'idempotency_key': row['key'], 'status': status}
+
+        try:
+            if new:
+                _insert_batch(new)
+            db.session.commit()
+            return results
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
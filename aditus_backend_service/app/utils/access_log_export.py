@@ -0,0 +1,79 @@
+import csv
+import io
+import json
+
+# Flat CSV columns: (header, path into a serialized access log)
+CSV_COLUMNS = (
+    ('id', ('id',)),
+    ('timestamp', ('timestamp',)),
+    ('action', ('action',)),
+    ('success', ('success',)),
+    ('failure_reason', ('failure_reason',)),
+    ('user_id', ('user', 'id')),
+    ('user_email', ('user', 'email')),
+    ('user_full_name', ('user', 'full_name')),
+    ('door_id', ('door', 'id')),
+    ('door_name', ('door', 'name')),
+    ('door_location', ('door', 'location')),
+    ('device_id', ('device', 'id')),
+    ('device_name', ('device', 'name')),
+    ('device_owner_id', ('device', 'owner_id')),
+    ('device_info', ('device_info',)),
+    ('ip_address', ('ip_address',)),
+)
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+# Rows buffered per chunk handed to the WSGI server
+CHUNK_ROWS = 500
+
+
+def _field(log, path):
+    value = log
+    for key in path:
+        value = value.get(key) if value else None
+    return value
+
+
+def stream_ndjson(logs):
+    """Yield serialized access logs as NDJSON chunks"""
+    chunk = []
+
+    for log in logs:
+        chunk.append(json.dumps(log, separators=(',', ':')))
+
+        if len(chunk) >= CHUNK_ROWS:
+            yield '\n'.join(chunk) + '\n'
+            chunk = []
+
+    if chunk:
+        yield '\n'.join(chunk) + '\n'
+
+
+def stream_csv(logs):
+    """Yield serialized access logs as CSV chunks, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([header for header, _ in CSV_COLUMNS])
+    rows = 0
+
+    for log in logs:
+        writer.writerow([_field(log, path) for _, path in CSV_COLUMNS])
+        rows += 1
+
+        if rows % CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_export(logs, export_format):
+    """Stream serialized access logs in one of EXPORT_FORMATS"""
+    if export_format == 'csv':
+        return stream_csv(logs)
+    return stream_ndjson(logs)
@@ -0,0 +1,370 @@
+import base64
+import heapq
+import json
+from datetime import datetime
+from itertools import islice
+from operator import itemgetter
+from flask import current_app
+from sqlalchemy import select, func, tuple_
+from app import db
+from app.models import User, Door, Device, AccessLog
+from app.utils.access_log_archive import find_archives, iter_archived_logs, count_archived_logs
+from app.utils.access_log_values import decode_value
+
+# Columns of a serialized access log row, fetched in a single joined SELECT
+LOG_COLUMNS = (
+    AccessLog.id,
+    AccessLog.action_code,
+    AccessLog.success,
+    AccessLog.failure_reason_code,
+    AccessLog.device_info_code,
+    AccessLog.ip_address,
+    AccessLog.timestamp,
+    User.id.label('user_id'),
+    User.email,
+    User.full_name,
+    Door.id.label('door_id'),
+    Door.name.label('door_name'),
+    Door.location,
+    Device.id.label('device_id'),
+    Device.name.label('device_name'),
+    Device.owner_id
+)
+
+
+def select_logs(*conditions):
+    """
+    Access logs matching conditions, newest first, joined with their user, door and device
+    Rows are plain tuples of LOG_COLUMNS; no ORM objects are built
+    """
+    return (
+        select(*LOG_COLUMNS)
+        .select_from(AccessLog)
+        .outerjoin(User, User.id == AccessLog.user_id)
+        .outerjoin(Door, Door.id == AccessLog.door_id)
+        .outerjoin(Device, Device.id == AccessLog.device_id)
+        .where(*conditions)
+        .order_by(AccessLog.timestamp.desc(), AccessLog.id.desc())
+    )
+
+
+def parse_timestamp(value, name):
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f'{name} must be an ISO date')
+
+    # Timestamps are stored as naive local times; compare on the wall clock like SQLite does
+    return parsed.replace(tzinfo=None)
+
+
+def parse_log_filters(args):
+    """
+    Access log filters from query params: success, user_id, door_id, device_id, from, to
+    Raises ValueError on malformed values
+    """
+    filters = {}
+
+    if args.get('success') is not None:
+        filters['success'] = args['success'].lower() == 'true'
+
+    for name in ('user_id', 'door_id', 'device_id'):
+        if args.get(name):
+            try:
+                filters[name] = int(args[name])
+            except ValueError:
+                raise ValueError(f'{name} must be an integer')
+
+    for name in ('from', 'to'):
+        if args.get(name):
+            filters[name] = parse_timestamp(args[name], name)
+
+    return filters
+
+
+def log_conditions(filters):
+    """SQL conditions on access_logs for parsed filters"""
+    conditions = []
+
+    if filters.get('success') is not None:
+        conditions.append(AccessLog.success == filters['success'])
+
+    for name in ('user_id', 'door_id', 'device_id'):
+        if filters.get(name) is not None:
+            conditions.append(getattr(AccessLog, name) == filters[name])
+
+    if filters.get('from') is not None:
+        conditions.append(AccessLog.timestamp >= filters['from'])
+
+    if filters.get('to') is not None:
+        conditions.append(AccessLog.timestamp <= filters['to'])
+
+    return conditions
+
+
+# Largest page accepted by get_log_page
+MAX_PAGE_SIZE = 500
+
+# Ways a page can report its total: fresh COUNT(*), short-lived cached COUNT(*), or not at all
+TOTAL_MODES = ('exact', 'estimate', 'none')
+
+
+def count_logs(*conditions):
+    """Exact number of access logs matching conditions"""
+    return db.session.execute(
+        select(func.count()).select_from(AccessLog).where(*conditions)
+    ).scalar()
+
+
+def estimate_logs(*conditions):
+    """
+    Number of access logs matching conditions, up to LOG_COUNT_CACHE_TTL seconds old
+    Pagers only need a rough total, so repeated page requests share one COUNT(*)
+    """
+    stmt = select(func.count()).select_from(AccessLog).where(*conditions)
+    compiled = stmt.compile()
+    key = (str(compiled), tuple(compiled.params.items()))
+
+    cache = current_app.extensions['log_count_cache']
+    total = cache.get(key)
+
+    if total is None:
+        total = db.session.execute(stmt).scalar()
+        cache.set(key, total)
+
+    return total
+
+
+def _total(filters, mode):
+    if mode == 'none':
+        return None
+
+    conditions = log_conditions(filters)
+    total = count_logs(*conditions) if mode == 'exact' else estimate_logs(*conditions)
+
+    archives = find_archives(filters)
+    if archives:
+        total += count_archived_logs(archives, filters)
+
+    return total
+
+
+def serialize_log_row(row):
+    """Same output as AccessLog.to_dict(), built from a select_logs row"""
+    (log_id, action_code, success, failure_reason_code, device_info_code, ip_address, timestamp,
+     user_id, email, full_name, door_id, door_name, location,
+     device_id, device_name, owner_id) = row
+
+    data = {
+        'id': log_id,
+        'action': decode_value(action_code),
+        'success': success,
+        'failure_reason': decode_value(failure_reason_code),
+        'device_info': decode_value(device_info_code),
+        'ip_address': ip_address,
+        'timestamp': timestamp.isoformat() if timestamp else None,
+    }
+
+    if user_id is not None:
+        data['user'] = {
+            'id': user_id,
+            'email': email,
+            'full_name': full_name or email
+        }
+
+    if door_id is not None:
+        data['door'] = {
+            'id': door_id,
+            'name': door_name,
+            'location': location
+        }
+
+    if device_id is not None:
+        data['device'] = {
+            'id': device_id,
+            'name': device_name,
+            'owner_id': owner_id
+        }
+
+    return data
+
+
+def encode_cursor(timestamp, log_id):
+    """Opaque cursor pointing just after the given (timestamp, id) position"""
+    raw = json.dumps([timestamp.isoformat(), log_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor
+    Raises ValueError if the cursor was not produced by encode_cursor
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, log_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+
+
+def _fetch_hot(conditions, after, limit, offset=0):
+    """Yield ((timestamp, id), serialized log) from access_logs, newest first"""
+    if after is not None:
+        conditions = conditions + [tuple_(AccessLog.timestamp, AccessLog.id) < tuple_(*after)]
+
+    stmt = select_logs(*conditions).limit(limit).offset(offset)
+
+    for row in db.session.execute(stmt):
+        yield (row.timestamp, row.id), serialize_log_row(row)
+
+
+def fetch_logs(filters, after=None, limit=50, offset=0):
+    """
+    Page of serialized access logs matching filters, newest first
+    after: continue strictly after this (timestamp, id) position (keyset pagination)
+    Archived months are only read once the page reaches past the hot rows
+    Returns a list of ((timestamp, id), log)
+    """
+    conditions = log_conditions(filters)
+    archives = find_archives(filters)
+
+    if not archives:
+        return list(_fetch_hot(conditions, after, limit, offset))
+
+    # The first offset + limit merged logs hold at most that many logs of either source
+    hot = list(_fetch_hot(conditions, after, offset + limit))
+
+    if len(hot) == offset + limit:
+        # A full page of hot rows only needs archives holding logs newer than its last one
+        oldest = hot[-1][0][0]
+        archives = [archive for archive in archives if archive.last_timestamp >= oldest]
+
+    if not archives:
+        return hot[offset:]
+
+    cold = iter_archived_logs(archives, filters, after)
+
+    try:
+        merged = heapq.merge(hot, cold, key=itemgetter(0), reverse=True)
+        return list(islice(_unique(merged), offset, offset + limit))
+    finally:
+        cold.close()
+
+
+def _iter_hot(conditions, batch_size):
+    """
+    Yield ((timestamp, id), serialized log) from access_logs in keyset pages of batch_size
+    The read transaction ends after every page, so a slow consumer never holds SQLite's lock
+    """
+    after = None
+
+    while True:
+        entries = list(_fetch_hot(conditions, after, batch_size))
+        db.session.rollback()
+
+        yield from entries
+
+        if len(entries) < batch_size:
+            return
+
+        after = entries[-1][0]
+
+
+def iter_logs(filters, batch_size=1000):
+    """
+    Every serialized access log matching filters, newest first, in constant memory
+    Rows are read from the database in keyset pages of batch_size, merged with any
+    archived months the filters reach (streamed from their files)
+    """
+    hot = _iter_hot(log_conditions(filters), batch_size)
+    archives = find_archives(filters)
+    db.session.rollback()
+
+    if not archives:
+        for _, log in hot:
+            yield log
+        return
+
+    cold = iter_archived_logs(archives, filters)
+
+    try:
+        for _, log in _unique(heapq.merge(hot, cold, key=itemgetter(0), reverse=True)):
+            yield log
+    finally:
+        cold.close()
+        hot.close()
+
+
+def _unique(entries):
+    """Skip a log present both in access_logs and an archive (interrupted archival)"""
+    previous = None
+    for key, log in entries:
+        if key != previous:
+            yield key, log
+        previous = key
+
+
+def _int_arg(args, name, default, minimum, maximum, message):
+    """Integer query param within [minimum, maximum] (maximum None: unbounded), else ValueError(message)"""
+    value = args.get(name)
+    if value is None:
+        return default
+
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(message)
+
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ValueError(message)
+
+    return value
+
+
+def get_log_page(filters, args):
+    """
+    Page of access logs matching filters, driven by the request's query params
+    - limit: number of results (default 50, max 500)
+    - cursor: keyset mode; pass it empty for the first page, then the returned next_cursor
+    - offset: offset mode (default 0), used when no cursor is given
+    - total: 'exact' (default), 'estimate' (cached count) or 'none' (skip counting)
+    Raises ValueError on an invalid limit, offset, cursor or total mode
+    """
+    limit = _int_arg(args, 'limit', 50, 1, MAX_PAGE_SIZE,
+                     f'limit must be an integer between 1 and {MAX_PAGE_SIZE}')
+    cursor = args.get('cursor')
+    total_mode = args.get('total', 'exact')
+
+    if total_mode not in TOTAL_MODES:
+        raise ValueError('total must be one of: ' + ', '.join(TOTAL_MODES))
+
+    if cursor is not None:
+        after = decode_cursor(cursor) if cursor else None
+
+        # One extra row tells whether another page follows
+        entries = fetch_logs(filters, after=after, limit=limit + 1)
+
+        next_cursor = None
+        if len(entries) > limit:
+            entries = entries[:limit]
+            next_cursor = encode_cursor(*entries[-1][0])
+
+        return {
+            'logs': [log for _, log in entries],
+            'total': _total(filters, total_mode),
+            'total_mode': total_mode,
+            'limit': limit,
+            'next_cursor': next_cursor
+        }
+
+    offset = _int_arg(args, 'offset', 0, 0, None, 'offset must be a non-negative integer')
+    entries = fetch_logs(filters, limit=limit, offset=offset)
+
+    return {
+        'logs': [log for _, log in entries],
+        'total': _total(filters, total_mode),
+        'total_mode': total_mode,
+        'limit': limit,
+        'offset': offset
+    }
@@ -0,0 +1,113 @@
+import threading
+from collections import deque
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import AccessLog
+from app.utils.access_log_values import encode_log_row, decode_log_row
+
+
+class AccessLogTail:
+    """
+    Bounded in-memory ring buffer of the access logs this process wrote most recently
+    Every entry gets a sequence number so live streams can resume where they left off
+    without querying the database. Sequence numbers restart with the process
+    """
+
+    def __init__(self, maxlen=1000):
+        self.maxlen = maxlen
+        self._entries = deque(maxlen=maxlen)
+        self._condition = threading.Condition()
+        self._seq = 0
+
+    @property
+    def seq(self):
+        """Sequence number of the newest entry (0 before the first one)"""
+        return self._seq
+
+    def publish(self, entries):
+        with self._condition:
+            for entry in entries:
+                self._seq += 1
+                self._entries.append((self._seq, entry))
+            self._condition.notify_all()
+
+    def since(self, seq):
+        """
+        (entries newer than seq, complete)
+        complete is False when entries after seq were already dropped from the buffer,
+        or seq was handed out by an earlier process
+        """
+        with self._condition:
+            oldest = self._entries[0][0] if self._entries else self._seq + 1
+            complete = oldest <= seq + 1 and seq <= self._seq
+            return [(s, entry) for s, entry in self._entries if s > seq], complete
+
+    def wait(self, seq, timeout):
+        """Block until an entry newer than seq is published or timeout expires"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > seq, timeout)
+            return self._seq
+
+    def stats(self):
+        with self._condition:
+            return {'size': len(self._entries), 'maxlen': self.maxlen, 'seq': self._seq}
+
+
+def get_access_log_tail():
+    """Get the access log ring buffer of the current application"""
+    return current_app.extensions['access_log_tail']
+
+
+def tail_entry(row):
+    """Live stream payload of an access log given as a column dict"""
+    timestamp = row.get('timestamp')
+
+    return {
+        'id': row.get('id'),
+        'user_id': row.get('user_id'),
+        'door_id': row.get('door_id'),
+        'device_id': row.get('device_id'),
+        'action': row.get('action'),
+        'success': bool(row.get('success')),
+        'failure_reason': row.get('failure_reason'),
+        'device_info': row.get('device_info'),
+        'ip_address': row.get('ip_address'),
+        'timestamp': timestamp.isoformat() if timestamp else None
+    }
+
+
+def tail_access_logs(rows):
+    """
+    Publish access logs (column dicts, id included) to the ring buffer once the transaction commits
+    """
+    db.session.info.setdefault('access_log_tail', []).extend(tail_entry(row) for row in rows)
+
+
+def insert_and_tail(rows):
+    """
+    Insert access log column dicts with one executemany and publish them with their ids
+    RETURNING rows come back in no guaranteed order, so entries are built from them and
+    published in id order
+    """
+    table = AccessLog.__table__
+    inserted = db.session.execute(
+        table.insert().returning(*table.c),
+        [encode_log_row(row) for row in rows]
+    ).mappings().all()
+
+    tail_access_logs(sorted((decode_log_row(row) for row in inserted), key=lambda row: row['id']))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_access_logs(session):
+    entries = session.info.pop('access_log_tail', None)
+
+    if entries and has_app_context():
+        get_access_log_tail().publish(entries)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_access_logs(session):
+    session.info.pop('access_log_tail', None)
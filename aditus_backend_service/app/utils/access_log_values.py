@@ -0,0 +1,129 @@
+from flask import current_app
+from sqlalchemy import select, event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import AccessLogValue
+
+# Access log columns stored as codes into access_log_values
+VALUE_KINDS = ('action', 'failure_reason', 'device_info')
+
+# Codes are cached in memory once committed: they never change, so entries are only
+# evicted for size. Codes created by a transaction stay in session.info until it commits
+
+
+def _insert(kind, value):
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING id (None if another transaction won)"""
+    table = AccessLogValue.__table__
+
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = (
+        insert(table)
+        .values(kind=kind, value=value)
+        .on_conflict_do_nothing(index_elements=[table.c.kind, table.c.value])
+        .returning(table.c.id)
+    )
+    return db.session.execute(stmt).scalar()
+
+
+def encode_value(kind, value):
+    """Code of a string in the access_log_values dictionary, added on first use"""
+    if value is None:
+        return None
+
+    value = str(value)
+    codes = current_app.extensions['log_value_codes']
+
+    code = codes.get((kind, value))
+    if code is not None:
+        return code
+
+    pending = db.session.info.setdefault('access_log_values', {})
+    if (kind, value) in pending:
+        return pending[kind, value]
+
+    code = db.session.execute(
+        select(AccessLogValue.id).where(AccessLogValue.kind == kind, AccessLogValue.value == value)
+    ).scalar()
+
+    if code is None:
+        code = _insert(kind, value)
+
+        if code is not None:
+            pending[kind, value] = code
+            return code
+
+        # Added by a concurrent transaction between the lookup and the insert
+        code = db.session.execute(
+            select(AccessLogValue.id).where(AccessLogValue.kind == kind, AccessLogValue.value == value)
+        ).scalar()
+
+    codes.set((kind, value), code)
+    current_app.extensions['log_values'].set(code, value)
+    return code
+
+
+def decode_value(code):
+    """String behind an access_log_values code"""
+    if code is None:
+        return None
+
+    values = current_app.extensions['log_values']
+
+    value = values.get(code)
+    if value is not None:
+        return value
+
+    for (_, pending_value), pending_code in db.session.info.get('access_log_values', {}).items():
+        if pending_code == code:
+            return pending_value
+
+    value = db.session.execute(select(AccessLogValue.value).where(AccessLogValue.id == code)).scalar()
+
+    if value is not None:
+        values.set(code, value)
+
+    return value
+
+
+def encode_log_row(row):
+    """Copy of an access log column dict with its strings replaced by *_code columns"""
+    encoded = {name: value for name, value in row.items() if name not in VALUE_KINDS}
+
+    for kind in VALUE_KINDS:
+        encoded[f'{kind}_code'] = encode_value(kind, row.get(kind))
+
+    return encoded
+
+
+def decode_log_row(row):
+    """Inverse of encode_log_row: access log column dict with its *_code columns decoded"""
+    decoded = {name: value for name, value in row.items() if not name.endswith('_code')}
+
+    for kind in VALUE_KINDS:
+        decoded[kind] = decode_value(row.get(f'{kind}_code'))
+
+    return decoded
+
+
+@event.listens_for(Session, 'after_commit')
+def _cache_committed_values(session):
+    pending = session.info.pop('access_log_values', None)
+
+    if not pending:
+        return
+
+    codes = current_app.extensions['log_value_codes']
+    values = current_app.extensions['log_values']
+
+    for (kind, value), code in pending.items():
+        codes.set((kind, value), code)
+        values.set(code, value)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_values(session):
+    session.info.pop('access_log_values', None)
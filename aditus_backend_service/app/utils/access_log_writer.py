@@ -0,0 +1,221 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import AccessLog
+from app.utils.access_stats import tally_rows, apply_counts
+from app.utils.access_log_tail import insert_and_tail
+
+logger = logging.getLogger(__name__)
+
+# Put on the queue by close() so a flusher waiting for more rows stops at once
+_STOP = object()
+
+# Columns an access log is queued with
+LOG_FIELDS = (
+    'user_id', 'door_id', 'device_id', 'action', 'success',
+    'failure_reason', 'device_info', 'ip_address', 'timestamp'
+)
+
+
+class AccessLogWriter:
+    """
+    Write-behind queue for access logs
+    Requests enqueue rows and return at once; a background thread inserts them in
+    batches (one executemany and one commit per batch) every batch_size rows or
+    flush_interval_ms milliseconds, whichever comes first
+
+    The queue is bounded: when it is full the row is written synchronously instead,
+    so a slow database slows requests down rather than losing logs. Rows still queued
+    at interpreter exit are flushed before the process ends
+    """
+
+    def __init__(self, app, batch_size=200, flush_interval_ms=200, max_queue=10000):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = Counter()
+        self._last_flush_ms = None
+        atexit.register(self.close)
+
+    def submit(self, **fields):
+        """Queue an access log; returns False if it had to be written synchronously"""
+        row = {name: fields.get(name) for name in LOG_FIELDS}
+        row['timestamp'] = row['timestamp'] or datetime.now()
+
+        self._ensure_started()
+
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count('sync_writes')
+            self._write([row])
+            return False
+
+        self._count('queued')
+        return True
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                'enabled': True,
+                'queue_depth': self._queue.qsize(),
+                'queue_capacity': self._queue.maxsize,
+                'batch_size': self.batch_size,
+                'flush_interval_ms': int(self.flush_interval * 1000),
+                'queued': self._stats['queued'],
+                'written': self._stats['written'],
+                'batches': self._stats['batches'],
+                'sync_writes': self._stats['sync_writes'],
+                'failed_batches': self._stats['failed_batches'],
+                'dropped': self._stats['dropped'],
+                'last_flush_ms': self._last_flush_ms
+            }
+
+    def close(self, timeout=10):
+        """Stop the flusher and write everything still queued"""
+        self._stopping.set()
+
+        if self._thread is not None:
+            try:
+                self._queue.put_nowait(_STOP)
+            except queue.Full:
+                pass  # The flusher has a full batch to write and will see the flag after it
+            self._thread.join(timeout)
+
+        self._flush(self._drain())
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='access-log-writer', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._flush(batch)
+
+    def _next_batch(self):
+        """Wait for a first row, then collect more until the batch is full or due"""
+        try:
+            row = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while row is not _STOP:
+            batch.append(row)
+
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                row = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _drain(self):
+        rows = []
+        while True:
+            try:
+                row = self._queue.get_nowait()
+            except queue.Empty:
+                return rows
+            if row is not _STOP:
+                rows.append(row)
+
+    def _flush(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            self._write(rows[start:start + self.batch_size])
+
+    def _write(self, rows):
+        if not rows:
+            return
+
+        started = time.monotonic()
+
+        with self.app.app_context():
+            try:
+                _insert(rows)
+                db.session.commit()
+                written = len(rows)
+            except Exception:
+                db.session.rollback()
+                logger.exception('Access log batch of %d rows failed, retrying one by one', len(rows))
+                self._count('failed_batches')
+                written = self._write_one_by_one(rows)
+            finally:
+                db.session.remove()
+
+        with self._stats_lock:
+            self._stats['written'] += written
+            self._stats['batches'] += 1
+            self._last_flush_ms = round((time.monotonic() - started) * 1000, 2)
+
+    def _write_one_by_one(self, rows):
+        written = 0
+
+        for row in rows:
+            try:
+                _insert([row])
+                db.session.commit()
+                written += 1
+            except Exception:
+                db.session.rollback()
+                logger.exception('Dropping access log that cannot be written: %r', row)
+                self._count('dropped')
+
+        return written
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+
+def _insert(rows):
+    """Insert rows with a single executemany, count them in the rollups and tail them"""
+    insert_and_tail(rows)
+    apply_counts(tally_rows(rows))
+
+
+def get_access_log_writer():
+    """Write-behind writer of the current application, None when disabled"""
+    return current_app.extensions.get('access_log_writer')
+
+
+def submit_access_log(**fields):
+    """
+    Record an access attempt
+    Queued for a batched write when ACCESS_LOG_WRITE_BEHIND is on (returns None),
+    otherwise written and committed right away (returns the AccessLog)
+    """
+    writer = get_access_log_writer()
+
+    if writer is not None:
+        writer.submit(**fields)
+        return None
+
+    log = AccessLog.log_access(**fields)
+    db.session.commit()
+    return log
@@ -0,0 +1,229 @@
+import time
+from collections import Counter
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import select, delete, event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import AccessLog, AccessLogRollup
+from app.utils.access_log_values import decode_value
+
+PERIODS = ('hour', 'day')
+DIMENSIONS = ('door', 'user', 'failure_reason')
+
+# Failed attempts logged without a reason are counted under this key
+UNSPECIFIED_REASON = 'unspecified'
+
+# Rows per multi-row upsert statement
+_UPSERT_BATCH = 500
+
+
+def bucket_start(timestamp, period):
+    """Start of the hour or day a timestamp falls in"""
+    if period == 'hour':
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _rollup_keys(timestamp, user_id, door_id, success, failure_reason):
+    """(period, dimension, bucket, key) rows an access attempt is counted in"""
+    keys = []
+
+    for period in PERIODS:
+        bucket = bucket_start(timestamp, period)
+        keys.append((period, 'door', bucket, str(door_id)))
+        keys.append((period, 'user', bucket, str(user_id)))
+
+        if not success:
+            keys.append((period, 'failure_reason', bucket, failure_reason or UNSPECIFIED_REASON))
+
+    return keys
+
+
+def tally(counts, timestamp, user_id, door_id, success, failure_reason):
+    """Add one access attempt to a Counter of (rollup key, outcome) -> count"""
+    outcome = 'granted' if success else 'denied'
+
+    for key in _rollup_keys(timestamp, user_id, door_id, success, failure_reason):
+        counts[key, outcome] += 1
+
+
+def tally_rows(rows):
+    """Counter of tally() counts for access log rows given as column dicts"""
+    counts = Counter()
+
+    for row in rows:
+        tally(counts, row['timestamp'], row['user_id'], row['door_id'],
+              row['success'], row['failure_reason'])
+
+    return counts
+
+
+def count_access(timestamp, user_id, door_id, success, failure_reason=None):
+    """
+    Count an access attempt in the rollups once the surrounding transaction commits
+    Attempts of one transaction are aggregated into a single upsert
+    """
+    counts = db.session.info.setdefault('access_stats', Counter())
+    tally(counts, timestamp, user_id, door_id, bool(success), failure_reason)
+
+
+def apply_counts(counts, session=None):
+    """
+    Add a Counter built by tally() to the rollup table with dialect upserts
+    Runs in the given session, or the current one
+    """
+    totals = {}
+    for (key, outcome), count in counts.items():
+        row = totals.setdefault(key, {'attempts': 0, 'granted': 0, 'denied': 0})
+        row['attempts'] += count
+        row[outcome] += count
+
+    rows = [
+        dict(zip(('period', 'dimension', 'bucket', 'key'), key), **values)
+        for key, values in totals.items()
+    ]
+    session = session or db.session
+
+    for start in range(0, len(rows), _UPSERT_BATCH):
+        session.execute(_upsert(rows[start:start + _UPSERT_BATCH]))
+
+
+def _upsert(rows):
+    """INSERT ... ON CONFLICT DO UPDATE adding to the existing counters"""
+    table = AccessLogRollup.__table__
+
+    if db.engine.dialect.name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    stmt = insert(table).values(rows)
+
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.period, table.c.dimension, table.c.bucket, table.c.key],
+        set_={
+            name: table.c[name] + stmt.excluded[name]
+            for name in ('attempts', 'granted', 'denied')
+        }
+    )
+
+
+def rebuild_access_stats(since, pause_ms=None):
+    """
+    Recount the rollups from access_logs for every bucket from since onwards
+    Backfills rollups for logs written before they existed and repairs drift
+    Months already moved to archives are never recounted (their rows are gone)
+    Each day is deleted, recounted and committed in its own short transaction, followed
+    by a pause (RETENTION_CHUNK_PAUSE_MS), so door log writes keep going on SQLite
+    Returns (first bucket rebuilt, number of logs counted)
+    """
+    from app.models import AccessLogArchive
+
+    if pause_ms is None:
+        pause_ms = current_app.config['RETENTION_CHUNK_PAUSE_MS']
+
+    start = bucket_start(since, 'day')
+
+    archived_until = db.session.execute(
+        select(db.func.max(AccessLogArchive.last_timestamp))
+    ).scalar()
+    if archived_until is not None and archived_until >= start:
+        start = bucket_start(archived_until, 'day') + timedelta(days=1)
+
+    counted = 0
+    day = start
+
+    while True:
+        # Jump over days holding neither logs nor (possibly drifted) rollups
+        day = _next_day_with_data(day)
+        if day is None:
+            break
+
+        next_day = day + timedelta(days=1)
+
+        # Deleting first takes the write lock, so concurrent logs are counted exactly once
+        # period and dimension lead the primary key, so the bucket range is an index search
+        db.session.execute(
+            delete(AccessLogRollup).where(
+                AccessLogRollup.period.in_(PERIODS),
+                AccessLogRollup.dimension.in_(DIMENSIONS),
+                AccessLogRollup.bucket >= day,
+                AccessLogRollup.bucket < next_day
+            )
+        )
+
+        rows = db.session.execute(
+            select(
+                AccessLog.timestamp,
+                AccessLog.user_id,
+                AccessLog.door_id,
+                AccessLog.success,
+                AccessLog.failure_reason_code
+            ).where(AccessLog.timestamp >= day, AccessLog.timestamp < next_day)
+        ).all()
+
+        counts = Counter()
+        for timestamp, user_id, door_id, success, failure_reason_code in rows:
+            tally(counts, timestamp, user_id, door_id, success, decode_value(failure_reason_code))
+
+        apply_counts(counts)
+        db.session.commit()
+
+        counted += len(rows)
+        day = next_day
+        time.sleep(pause_ms / 1000)
+
+    return start, counted
+
+
+def _next_day_with_data(day):
+    """Start of the first day from day onwards holding access logs or rollups, or None"""
+    candidates = (
+        db.session.execute(select(db.func.min(AccessLog.timestamp)).where(AccessLog.timestamp >= day)).scalar(),
+        db.session.execute(
+            select(db.func.min(AccessLogRollup.bucket)).where(AccessLogRollup.bucket >= day)
+        ).scalar()
+    )
+    found = [bucket_start(value, 'day') for value in candidates if value is not None]
+    return min(found) if found else None
+
+
+def query_access_stats(period, dimension, start, end, key=None):
+    """
+    Rollup rows of one period and dimension with buckets between start and end
+    Returns a list of dicts ordered by bucket then key
+    """
+    query = AccessLogRollup.query.filter(
+        AccessLogRollup.period == period,
+        AccessLogRollup.dimension == dimension,
+        AccessLogRollup.bucket >= bucket_start(start, period),
+        AccessLogRollup.bucket <= end
+    )
+
+    if key is not None:
+        query = query.filter(AccessLogRollup.key == str(key))
+
+    return [
+        {
+            'bucket': row.bucket.isoformat(),
+            'key': int(row.key) if dimension != 'failure_reason' else row.key,
+            'attempts': row.attempts,
+            'granted': row.granted,
+            'denied': row.denied
+        }
+        for row in query.order_by(AccessLogRollup.bucket, AccessLogRollup.key)
+    ]
+
+
+@event.listens_for(Session, 'before_commit')
+def _apply_access_stats(session):
+    counts = session.info.pop('access_stats', None)
+
+    if counts:
+        apply_counts(counts, session=session)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_access_stats(session):
+    session.info.pop('access_stats', None)
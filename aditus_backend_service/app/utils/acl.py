@@ -0,0 +1,192 @@
+from flask import has_app_context
+from sqlalchemy import select, exists, and_, event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import (
+    Door,
+    EffectiveDoorAccess,
+    user_groups,
+    user_door_access,
+    user_door_exceptions,
+    group_door_access,
+    group_door_exceptions
+)
+
+DIRECT_ACCESS = 'direct_access'
+GROUP_ACCESS = 'group_access'
+
+
+def _scoped(stmt, user_column, door_column, user_ids, door_ids):
+    """Restrict a statement to the given users and/or doors (None means all)"""
+    if user_ids is not None:
+        stmt = stmt.where(user_column.in_(user_ids))
+    if door_ids is not None:
+        stmt = stmt.where(door_column.in_(door_ids))
+    return stmt
+
+
+def compute_effective_access(user_ids=None, door_ids=None):
+    """
+    Resolve effective access straight from the association tables
+    Priority: Exceptions > Direct Access > Group Access
+    Returns a dict {(user_id, door_id): source}
+    """
+    denied_stmt = _scoped(
+        select(user_door_exceptions.c.user_id, user_door_exceptions.c.door_id),
+        user_door_exceptions.c.user_id, user_door_exceptions.c.door_id,
+        user_ids, door_ids
+    )
+    direct_stmt = _scoped(
+        select(user_door_access.c.user_id, user_door_access.c.door_id),
+        user_door_access.c.user_id, user_door_access.c.door_id,
+        user_ids, door_ids
+    )
+    # A group grant only counts if that same group is not blacklisted from the door
+    group_stmt = _scoped(
+        select(user_groups.c.user_id, group_door_access.c.door_id)
+        .select_from(user_groups.join(
+            group_door_access, group_door_access.c.group_id == user_groups.c.group_id
+        ))
+        .where(~exists().where(and_(
+            group_door_exceptions.c.group_id == user_groups.c.group_id,
+            group_door_exceptions.c.door_id == group_door_access.c.door_id
+        )))
+        .distinct(),
+        user_groups.c.user_id, group_door_access.c.door_id,
+        user_ids, door_ids
+    )
+
+    denied = {tuple(row) for row in db.session.execute(denied_stmt)}
+
+    effective = {}
+    for row in db.session.execute(group_stmt):
+        if tuple(row) not in denied:
+            effective[tuple(row)] = GROUP_ACCESS
+    for row in db.session.execute(direct_stmt):
+        if tuple(row) not in denied:
+            effective[tuple(row)] = DIRECT_ACCESS
+
+    return effective
+
+
+def query_doors_with_access(user_id, active_only=True, accessible_only=False):
+    """
+    Doors paired with a user's access type ('direct_access', 'group_access' or None),
+    resolved for every door at once with a single join against effective_door_access
+    Returns a query of (Door, access_type) rows
+    """
+    access_join = and_(
+        EffectiveDoorAccess.door_id == Door.id,
+        EffectiveDoorAccess.user_id == user_id
+    )
+
+    query = db.session.query(Door, EffectiveDoorAccess.source)
+    if accessible_only:
+        query = query.join(EffectiveDoorAccess, access_join)
+    else:
+        query = query.outerjoin(EffectiveDoorAccess, access_join)
+
+    if active_only:
+        query = query.filter(Door.is_active.is_(True))
+
+    return query.order_by(Door.id)
+
+
+def refresh_effective_access(user_ids=None, door_ids=None):
+    """
+    Bring effective_door_access in line with the association tables for the given scope
+    Call after changing groups, grants or exceptions, before committing
+    Passing no scope rebuilds the whole table
+    Returns the set of (user_id, door_id) pairs whose access changed
+    """
+    if user_ids is not None:
+        user_ids = list(user_ids)
+    if door_ids is not None:
+        door_ids = list(door_ids)
+    if user_ids == [] or door_ids == []:
+        return set()
+
+    db.session.flush()
+
+    wanted = compute_effective_access(user_ids, door_ids)
+
+    query = _scoped(
+        EffectiveDoorAccess.query,
+        EffectiveDoorAccess.user_id, EffectiveDoorAccess.door_id,
+        user_ids, door_ids
+    )
+
+    changed = set()
+    for entry in query.all():
+        pair = (entry.user_id, entry.door_id)
+        source = wanted.pop(pair, None)
+
+        if source is None:
+            db.session.delete(entry)
+            changed.add(pair)
+        elif source != entry.source:
+            entry.source = source
+            changed.add(pair)
+
+    for (user_id, door_id), source in wanted.items():
+        db.session.add(EffectiveDoorAccess(user_id=user_id, door_id=door_id, source=source))
+        changed.add((user_id, door_id))
+
+    _record_changes(changed)
+    return changed
+
+
+def clear_effective_access(user_ids=None, door_ids=None):
+    """
+    Drop effective access rows for users or doors that are about to be deleted
+    Returns the set of (user_id, door_id) pairs removed
+    """
+    query = _scoped(
+        EffectiveDoorAccess.query,
+        EffectiveDoorAccess.user_id, EffectiveDoorAccess.door_id,
+        user_ids, door_ids
+    )
+
+    removed = set()
+    for entry in query.all():
+        removed.add((entry.user_id, entry.door_id))
+        db.session.delete(entry)
+
+    _record_changes(removed)
+    return removed
+
+
+def _record_changes(changed):
+    """
+    Propagate changed pairs to the door ACL journal and remember them until the
+    surrounding transaction commits
+    """
+    if not changed:
+        return
+
+    from app.utils.door_acl import sync_door_acl
+    sync_door_acl(
+        user_ids={user_id for user_id, _ in changed},
+        door_ids={door_id for _, door_id in changed}
+    )
+
+    db.session.info.setdefault('acl_changes', set()).update(changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_acl_changes(session):
+    """Propagate committed ACL changes to in-memory state"""
+    changed = session.info.pop('acl_changes', None)
+
+    if not changed or not has_app_context():
+        return
+
+    from app.utils.acl_index import get_acl_index
+    from app.utils.access_decisions import get_access_decision_cache
+    get_acl_index().invalidate_doors({door_id for _, door_id in changed})
+    get_access_decision_cache().invalidate_pairs(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_acl_changes(session):
+    session.info.pop('acl_changes', None)
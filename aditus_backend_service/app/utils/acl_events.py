@@ -0,0 +1,77 @@
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import DoorAclChange
+
+
+class AclEventNotifier:
+    """
+    Wakes up ACL event streams as soon as this process commits a door ACL change
+    Changes committed by other processes are picked up by the streams' periodic poll
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._generation = 0
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def notify(self):
+        with self._condition:
+            self._generation += 1
+            self._condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """Block until something newer than generation is published or timeout expires"""
+        with self._condition:
+            self._condition.wait_for(lambda: self._generation != generation, timeout)
+            return self._generation
+
+
+def get_acl_event_notifier():
+    """Get the ACL event notifier of the current application"""
+    return current_app.extensions['acl_events']
+
+
+def fetch_door_acl_events(door_id, after_version, user_id=None, limit=500):
+    """Journal entries of a door newer than after_version, optionally for one user's devices"""
+    query = DoorAclChange.query.filter(
+        DoorAclChange.door_id == door_id,
+        DoorAclChange.id > after_version
+    )
+
+    if user_id is not None:
+        query = query.filter(DoorAclChange.user_id == user_id)
+
+    return query.order_by(DoorAclChange.id).limit(limit).all()
+
+
+def acl_event_payload(change):
+    return {
+        'door_id': change.door_id,
+        'version': change.id,
+        'device_id': change.device_id,
+        'user_id': change.user_id,
+        'fingerprint': change.fingerprint,
+        'added': change.added
+    }
+
+
+def mark_door_acl_changed():
+    """Flag the current transaction so streams are woken up once it commits"""
+    db.session.info['door_acl_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _notify_acl_streams(session):
+    if session.info.pop('door_acl_changed', False) and has_app_context():
+        get_acl_event_notifier().notify()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_acl_stream_flag(session):
+    session.info.pop('door_acl_changed', None)
@@ -0,0 +1,102 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models import EffectiveDoorAccess
+
+
+class AclIndex:
+    """
+    In-memory copy of effective_door_access stored as one bitset per door and access type
+    Bit n of a door's bitset is set when the user with id n can open that door
+
+    Doors touched by a committed ACL change are marked stale and reloaded on their next
+    lookup; the whole index is reloaded every max_age seconds so that changes committed
+    by other worker processes are picked up as well
+    """
+
+    def __init__(self, max_age=30):
+        self.max_age = max_age
+        self._direct = {}
+        self._group = {}
+        self._stale_doors = set()
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    def access_type(self, user_id, door_id):
+        """Return 'direct_access', 'group_access' or None for a user/door pair"""
+        self._ensure_fresh(door_id)
+
+        bit = 1 << user_id
+        if self._direct.get(door_id, 0) & bit:
+            return 'direct_access'
+        if self._group.get(door_id, 0) & bit:
+            return 'group_access'
+        return None
+
+    def fresh_for(self):
+        """Seconds until the next full reload; results read now may be stale after that"""
+        if self._loaded_at is None:
+            return 0
+        return max(0, self._loaded_at + self.max_age - time.monotonic())
+
+    def invalidate_doors(self, door_ids):
+        """Mark doors whose permissions changed so they are rebuilt on next use"""
+        with self._lock:
+            self._stale_doors.update(door_ids)
+
+    def _ensure_fresh(self, door_id):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age:
+            self._load_all()
+        elif door_id in self._stale_doors:
+            self._load_door(door_id)
+
+    def _load_all(self):
+        with self._lock:
+            self._stale_doors.clear()
+            rows = db.session.execute(select(
+                EffectiveDoorAccess.door_id,
+                EffectiveDoorAccess.user_id,
+                EffectiveDoorAccess.source
+            ))
+            self._direct, self._group = self._build_bitsets(rows)
+            self._loaded_at = time.monotonic()
+
+    def _load_door(self, door_id):
+        with self._lock:
+            self._stale_doors.discard(door_id)
+            rows = db.session.execute(
+                select(
+                    EffectiveDoorAccess.door_id,
+                    EffectiveDoorAccess.user_id,
+                    EffectiveDoorAccess.source
+                ).where(EffectiveDoorAccess.door_id == door_id)
+            )
+            direct, group = self._build_bitsets(rows)
+            self._direct[door_id] = direct.get(door_id, 0)
+            self._group[door_id] = group.get(door_id, 0)
+
+    @staticmethod
+    def _build_bitsets(rows):
+        """Group (door_id, user_id, source) rows into {door_id: bitset} per source"""
+        user_ids = {'direct_access': {}, 'group_access': {}}
+        for door_id, user_id, source in rows:
+            user_ids[source].setdefault(door_id, []).append(user_id)
+
+        return (
+            {door_id: _to_bitset(ids) for door_id, ids in user_ids['direct_access'].items()},
+            {door_id: _to_bitset(ids) for door_id, ids in user_ids['group_access'].items()}
+        )
+
+
+def _to_bitset(user_ids):
+    bits = bytearray(max(user_ids) // 8 + 1)
+    for user_id in user_ids:
+        bits[user_id >> 3] |= 1 << (user_id & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def get_acl_index():
+    """Get the ACL index of the current application"""
+    return current_app.extensions['acl_index']
@@ -0,0 +1,64 @@
+from itertools import chain
+from flask import request, make_response
+from sqlalchemy import event, update, insert
+from sqlalchemy.orm import Session
+from app import db
+from app.models import User, Device, Door, Group, EffectiveDoorAccess, AclVersion
+
+GLOBAL_SCOPE = 'global'
+
+# Any change to these (including their group/door/user associations) can change
+# the door lists, access rules and profiles served to clients
+TRACKED_MODELS = (User, Device, Door, Group, EffectiveDoorAccess)
+
+
+def get_acl_version():
+    """Current global ACL version (0 before the first change)"""
+    version = db.session.query(AclVersion.version).filter_by(scope=GLOBAL_SCOPE).scalar()
+    return version or 0
+
+
+def acl_etag(*parts):
+    """Build an ETag for a permission-dependent payload from the ACL version and request variant"""
+    return '-'.join(['acl', str(get_acl_version())] + [str(part) for part in parts])
+
+
+def not_modified(etag):
+    """Return a 304 response if the client already has this ETag, otherwise None"""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def with_etag(response, etag):
+    """Attach an ETag to a (response, status) tuple returned by a view"""
+    response, status = response
+    response.set_etag(etag)
+    return response, status
+
+
+@event.listens_for(Session, 'before_flush')
+def _detect_acl_changes(session, flush_context, instances):
+    objects = chain(session.new, session.deleted, (o for o in session.dirty if session.is_modified(o)))
+    if any(isinstance(obj, TRACKED_MODELS) for obj in objects):
+        session.info['acl_version_bump'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_acl_version(session, flush_context):
+    """Bump the global version inside the same transaction as the change itself"""
+    if not session.info.pop('acl_version_bump', False):
+        return
+
+    connection = session.connection()
+    table = AclVersion.__table__
+
+    result = connection.execute(
+        update(table)
+        .where(table.c.scope == GLOBAL_SCOPE)
+        .values(version=table.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(scope=GLOBAL_SCOPE, version=1))
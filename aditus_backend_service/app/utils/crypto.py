@@ -0,0 +1,83 @@
+import base64
+import binascii
+import hashlib
+from flask import current_app
+from cryptography.exceptions import InvalidSignature, UnsupportedAlgorithm
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+
+
+def load_public_key(public_key_pem):
+    """
+    Parse a PEM encoded device public key
+    Returns None if the key cannot be parsed or is not an RSA key
+    """
+    try:
+        public_key = serialization.load_pem_public_key(public_key_pem.encode())
+    except (ValueError, UnsupportedAlgorithm):
+        return None
+
+    if not isinstance(public_key, rsa.RSAPublicKey):
+        return None
+
+    return public_key
+
+
+def get_cached_public_key(device):
+    """
+    Get the parsed public key of a device, parsing its PEM at most once
+    Parsed keys are cached per device id; the cached PEM is compared on every hit so a
+    changed key (or a reused device id) is never verified against a stale key
+    """
+    cache = current_app.extensions['public_key_cache']
+    cached = cache.get(device.id)
+
+    if cached is not None and cached[0] == device.public_key:
+        return cached[1]
+
+    public_key = load_public_key(device.public_key)
+    cache.set(device.id, (device.public_key, public_key))
+    return public_key
+
+
+def forget_device_public_key(device_id):
+    """Drop a device's parsed key after it is deleted or its key changes"""
+    current_app.extensions['public_key_cache'].pop(device_id)
+
+
+def verify_signature(public_key, challenge, signature_b64):
+    """
+    Verify a base64 SHA-256/RSA (PKCS#1 v1.5) signature of a challenge string
+    Same scheme the mobile apps sign with and the ESP32 used to verify locally
+    """
+    if public_key is None:
+        return False
+
+    try:
+        signature = base64.b64decode(signature_b64, validate=True)
+    except (binascii.Error, ValueError):
+        return False
+
+    try:
+        public_key.verify(signature, challenge.encode(), padding.PKCS1v15(), hashes.SHA256())
+    except InvalidSignature:
+        return False
+
+    return True
+
+
+def public_key_fingerprint(public_key_pem):
+    """
+    SHA-256 fingerprint (hex) of a public key's DER SubjectPublicKeyInfo encoding
+    Returns None if the key cannot be parsed
+    """
+    public_key = load_public_key(public_key_pem)
+
+    if public_key is None:
+        return None
+
+    der = public_key.public_bytes(
+        serialization.Encoding.DER,
+        serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return hashlib.sha256(der).hexdigest()
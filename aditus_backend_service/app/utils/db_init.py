@@ -1,4 +1,5 @@
 import os
+from sqlalchemy.schema import CreateTable, CreateIndex
 from app import db
 from app.models import User
 
@@ -33,4 +34,148 @@ def create_admin_user():
         print(f"  Password: {admin_password}")
         print("  IMPORTANT: Change this password in production!")
     else:
-        print(f"✓ Admin user already exists: {admin_exists.email}")
\ No newline at end of file
+        print(f"✓ Admin user already exists: {admin_exists.email}")
+
+def sync_effective_access():
+    """
+    Rebuild the effective door access table from the association tables,
+    then the per-door device ACLs published to door controllers
+    Backfills new databases and repairs any drift on startup
+    """
+    from app.utils.acl import refresh_effective_access
+    from app.utils.door_acl import sync_door_acl
+
+    changed = refresh_effective_access()
+    changed_doors = sync_door_acl()
+    db.session.commit()
+
+    print(f"✓ Effective door access synced ({len(changed)} changes, {len(changed_doors)} door ACLs updated)")
+
+
+# Indexes replaced by newer composite ones, dropped from existing databases
+SUPERSEDED_INDEXES = (
+    'ix_access_logs_user_id',
+    'ix_access_logs_door_id',
+    'ix_access_logs_device_id',
+)
+
+
+def ensure_indexes():
+    """
+    Create indexes declared on models that existing tables are missing
+    db.create_all() only creates indexes together with new tables
+    """
+    inspector = db.inspect(db.engine)
+    created = []
+
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+
+        for name in SUPERSEDED_INDEXES:
+            if name in existing:
+                db.session.execute(db.text(f'DROP INDEX {name}'))
+
+    db.session.commit()
+
+    if created:
+        print(f"✓ Indexes created: {', '.join(created)}")
+
+
+def migrate_access_logs():
+    """
+    Rebuild an access_logs table created before action, failure_reason and device_info
+    were dictionary-encoded into access_log_values
+    The table is renamed, recreated from the model (which also gives SQLite tables created
+    before it was declared AUTOINCREMENT) and refilled with codes in a single transaction
+    """
+    from app.models import AccessLog
+
+    inspector = db.inspect(db.engine)
+    columns = {column['name'] for column in inspector.get_columns('access_logs')}
+
+    if 'action_code' in columns:
+        return
+
+    table = AccessLog.__table__
+    dialect = db.engine.dialect
+    legacy = 'access_logs_legacy'
+
+    statements = [f'ALTER TABLE access_logs RENAME TO {legacy}']
+
+    # Index names are global in SQLite and per schema in PostgreSQL, so free them first
+    statements += [f"DROP INDEX {index['name']}" for index in inspector.get_indexes('access_logs')]
+    if dialect.name == 'postgresql':
+        statements.append(f'ALTER INDEX access_logs_pkey RENAME TO {legacy}_pkey')
+
+    statements.append(str(CreateTable(table).compile(dialect=dialect)))
+    statements += [str(CreateIndex(index).compile(dialect=dialect)) for index in table.indexes]
+
+    for kind in ('action', 'failure_reason', 'device_info'):
+        statements.append(
+            f"INSERT INTO access_log_values (kind, value) "
+            f"SELECT DISTINCT '{kind}', l.{kind} FROM {legacy} l "
+            f"WHERE l.{kind} IS NOT NULL AND NOT EXISTS ("
+            f"SELECT 1 FROM access_log_values v WHERE v.kind = '{kind}' AND v.value = l.{kind})"
+        )
+
+    statements += [
+        f"INSERT INTO access_logs (id, user_id, door_id, device_id, action_code, success, "
+        f"failure_reason_code, device_info_code, ip_address, timestamp) "
+        f"SELECT l.id, l.user_id, l.door_id, l.device_id, a.id, l.success, f.id, d.id, "
+        f"l.ip_address, l.timestamp FROM {legacy} l "
+        f"JOIN access_log_values a ON a.kind = 'action' AND a.value = l.action "
+        f"LEFT JOIN access_log_values f ON f.kind = 'failure_reason' AND f.value = l.failure_reason "
+        f"LEFT JOIN access_log_values d ON d.kind = 'device_info' AND d.value = l.device_info",
+        f'DROP TABLE {legacy}'
+    ]
+
+    if dialect.name == 'postgresql':
+        statements.append(
+            "SELECT setval(pg_get_serial_sequence('access_logs', 'id'), "
+            "COALESCE(MAX(id), 0) + 1, false) FROM access_logs"
+        )
+
+    db.session.commit()
+    _execute_in_transaction(statements)
+
+    count = db.session.execute(db.text('SELECT COUNT(*) FROM access_logs')).scalar()
+    print(f'✓ access_logs rebuilt with dictionary-encoded values ({count} rows)')
+
+
+def _execute_in_transaction(statements):
+    """Run statements, DDL included, in one transaction"""
+    if db.engine.dialect.name != 'sqlite':
+        with db.engine.begin() as connection:
+            for statement in statements:
+                connection.exec_driver_sql(statement)
+        return
+
+    # pysqlite only opens transactions before DML and would commit each DDL statement
+    # on its own, so drive the transaction explicitly
+    raw = db.engine.raw_connection()
+    connection = raw.driver_connection
+    isolation_level = connection.isolation_level
+
+    try:
+        connection.isolation_level = None
+        cursor = connection.cursor()
+        cursor.execute('BEGIN')
+
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute('COMMIT')
+        except Exception:
+            cursor.execute('ROLLBACK')
+            raise
+    finally:
+        connection.isolation_level = isolation_level
+        raw.close()
@@ -0,0 +1,145 @@
+import struct
+from sqlalchemy import select, func
+from app import db
+from app.models import Device, EffectiveDoorAccess, DoorAclEntry, DoorAclChange
+from app.utils.crypto import public_key_fingerprint
+from app.utils.acl_events import mark_door_acl_changed
+
+# Snapshot layout (big-endian):
+#   header: magic 'AACL' | format u8 | kind u8 (0 full, 1 delta) | version u64 | entry count u32
+#   entry:  op u8 (1 add, 0 remove) | device_id u32 | fingerprint 32 bytes
+SNAPSHOT_MAGIC = b'AACL'
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_FULL = 0
+SNAPSHOT_DELTA = 1
+
+_HEADER = struct.Struct('>4sBBQI')
+_ENTRY = struct.Struct('>BI32s')
+
+
+def sync_door_acl(user_ids=None, door_ids=None):
+    """
+    Bring door_acl_entries in line with effective access and registered devices
+    for the given scope, journaling every addition and removal
+    Passing no scope resyncs every door
+    Returns the set of door ids whose ACL changed
+    """
+    wanted_stmt = (
+        select(EffectiveDoorAccess.door_id, Device.id, Device.owner_id, Device.public_key)
+        .join(Device, Device.owner_id == EffectiveDoorAccess.user_id)
+    )
+    stored_query = DoorAclEntry.query
+
+    if user_ids is not None:
+        wanted_stmt = wanted_stmt.where(EffectiveDoorAccess.user_id.in_(list(user_ids)))
+        stored_query = stored_query.filter(DoorAclEntry.user_id.in_(list(user_ids)))
+    if door_ids is not None:
+        wanted_stmt = wanted_stmt.where(EffectiveDoorAccess.door_id.in_(list(door_ids)))
+        stored_query = stored_query.filter(DoorAclEntry.door_id.in_(list(door_ids)))
+
+    stored = {(entry.door_id, entry.device_id): entry for entry in stored_query.all()}
+
+    # Device keys never change, so only devices new to the scope need parsing
+    fingerprints = {entry.device_id: entry.fingerprint for entry in stored.values()}
+
+    wanted = {}
+    for door_id, device_id, user_id, public_key in db.session.execute(wanted_stmt):
+        if device_id not in fingerprints:
+            fingerprints[device_id] = public_key_fingerprint(public_key)
+
+        # Keys the backend cannot parse cannot be checked by the door either
+        if fingerprints[device_id]:
+            wanted[(door_id, device_id)] = (user_id, fingerprints[device_id])
+
+    changed_doors = set()
+
+    for key, entry in stored.items():
+        if key not in wanted:
+            _journal(entry.door_id, entry.device_id, entry.user_id, entry.fingerprint, added=False)
+            db.session.delete(entry)
+            changed_doors.add(entry.door_id)
+
+    for (door_id, device_id), (user_id, fingerprint) in wanted.items():
+        if (door_id, device_id) not in stored:
+            _journal(door_id, device_id, user_id, fingerprint, added=True)
+            db.session.add(DoorAclEntry(
+                door_id=door_id,
+                device_id=device_id,
+                user_id=user_id,
+                fingerprint=fingerprint
+            ))
+            changed_doors.add(door_id)
+
+    return changed_doors
+
+
+def forget_device(device_id):
+    """
+    Remove a device from every door ACL before it is deleted
+    Returns the set of door ids whose ACL changed
+    """
+    changed_doors = set()
+
+    for entry in DoorAclEntry.query.filter_by(device_id=device_id).all():
+        _journal(entry.door_id, entry.device_id, entry.user_id, entry.fingerprint, added=False)
+        db.session.delete(entry)
+        changed_doors.add(entry.door_id)
+
+    return changed_doors
+
+
+def _journal(door_id, device_id, user_id, fingerprint, added):
+    mark_door_acl_changed()
+    db.session.add(DoorAclChange(
+        door_id=door_id,
+        device_id=device_id,
+        user_id=user_id,
+        fingerprint=fingerprint,
+        added=added
+    ))
+
+
+def get_door_acl_version(door_id):
+    """Latest ACL version of a door (0 if its ACL never changed)"""
+    return db.session.query(func.max(DoorAclChange.id)).filter_by(door_id=door_id).scalar() or 0
+
+
+def build_door_snapshot(door_id, since_version=None):
+    """
+    Encode a door's ACL as a compact binary snapshot
+    Full device list when since_version is missing or unknown to this server,
+    otherwise only the net additions and removals after since_version
+    Returns (version, payload)
+    """
+    # Read the version before the data: a change committed in between is sent twice,
+    # which is harmless, rather than never
+    version = get_door_acl_version(door_id)
+
+    if since_version and 0 < since_version <= version:
+        changes = (
+            DoorAclChange.query
+            .filter(DoorAclChange.door_id == door_id, DoorAclChange.id > since_version)
+            .order_by(DoorAclChange.id)
+            .all()
+        )
+
+        # Only the last change per device matters to the door
+        latest = {}
+        for change in changes:
+            latest[change.device_id] = change
+            version = max(version, change.id)
+
+        kind = SNAPSHOT_DELTA
+        entries = [(1 if c.added else 0, c.device_id, c.fingerprint) for c in latest.values()]
+    else:
+        kind = SNAPSHOT_FULL
+        entries = [
+            (1, entry.device_id, entry.fingerprint)
+            for entry in DoorAclEntry.query.filter_by(door_id=door_id).all()
+        ]
+
+    payload = bytearray(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT, kind, version, len(entries)))
+    for op, device_id, fingerprint in entries:
+        payload += _ENTRY.pack(op, device_id, bytes.fromhex(fingerprint))
+
+    return version, bytes(payload)
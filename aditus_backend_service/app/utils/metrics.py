@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+from functools import wraps
+from flask import current_app
+
+# In-memory caches reported by the metrics endpoint: name -> app.extensions key
+CACHES = {
+    'access_decisions': 'access_decisions',
+    'public_keys': 'public_key_cache',
+    'log_counts': 'log_count_cache',
+    'log_values': 'log_values',
+    'log_value_codes': 'log_value_codes'
+}
+
+# Endpoints whose latency is measured on its own: name -> app.extensions key
+LATENCIES = {
+    'login': 'login_latency'
+}
+
+
+class LatencyRecorder:
+    """
+    Request durations of one endpoint
+    Percentiles are computed over the last window requests
+    """
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self.count += 1
+            self._samples.append(seconds)
+
+    def stats(self):
+        with self._lock:
+            samples = sorted(self._samples)
+
+        if not samples:
+            return {'count': self.count, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+
+        def percentile(p):
+            return round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 2)
+
+        return {
+            'count': self.count,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(samples[-1] * 1000, 2)
+        }
+
+
+def record_latency(key):
+    """Decorator measuring a view's duration into the LatencyRecorder at app.extensions[key]"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                current_app.extensions[key].record(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def collect_metrics():
+    """Snapshot of this worker's in-memory counters"""
+    writer = current_app.extensions.get('access_log_writer')
+
+    return {
+        'caches': {
+            name: current_app.extensions[key].stats()
+            for name, key in CACHES.items()
+        },
+        'latency': {
+            name: current_app.extensions[key].stats()
+            for name, key in LATENCIES.items()
+        },
+        'access_log_writer': writer.stats() if writer else {'enabled': False},
+        'denied_throttle': current_app.extensions['denied_throttle'].stats(),
+        'password_hashing': current_app.extensions['password_hasher'].stats()
+    }
@@ -0,0 +1,130 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app, jsonify
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHashingBusy(Exception):
+    """The hashing pool is full, or a hash did not finish in time"""
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification in a dedicated, size-limited process pool
+    scrypt is slow on purpose and holds the GIL, so hashing on request threads stalls
+    every other request of the worker, door traffic included
+
+    At most max_pending hashes may be queued or running; further ones are refused at once
+    with PasswordHashingBusy instead of piling up. workers=0 hashes on the calling thread
+    """
+
+    def __init__(self, method='scrypt', workers=2, max_pending=16, timeout=10):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._method_prefix = None
+        self._counts = {'hashed': 0, 'verified': 0, 'rejected': 0, 'timeouts': 0}
+        self._pending = 0
+
+    def hash(self, password):
+        """Hash a password with the configured method"""
+        password_hash = self._run(generate_password_hash, password, self.method)
+        self._count('hashed')
+        return password_hash
+
+    def verify(self, password_hash, password):
+        """Check a password against a stored hash"""
+        valid = self._run(check_password_hash, password_hash, password)
+        self._count('verified')
+        return valid
+
+    def needs_rehash(self, password_hash):
+        """True if a stored hash was made with other parameters than the configured method"""
+        if self._method_prefix is None:
+            # 'scrypt' expands to 'scrypt:32768:8:1' etc.; learn the full form once
+            self._method_prefix = self.hash('').split('$', 1)[0]
+
+        return password_hash.split('$', 1)[0] != self._method_prefix
+
+    def stats(self):
+        with self._lock:
+            return dict(
+                self._counts,
+                method=self.method,
+                workers=self.workers,
+                max_pending=self.max_pending,
+                pending=self._pending
+            )
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._counts[name] += delta
+
+    def _acquire(self):
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise PasswordHashingBusy()
+
+        with self._lock:
+            self._pending += 1
+
+    def _release(self, *_):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def _get_executor(self):
+        with self._lock:
+            # A pool inherited from the parent process (e.g. gunicorn --preload) is unusable
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, function, *args):
+        self._acquire()
+
+        if not self.workers:
+            try:
+                return function(*args)
+            finally:
+                self._release()
+
+        try:
+            future = self._get_executor().submit(function, *args)
+        except BrokenProcessPool:
+            self._release()
+            self._executor = None
+            raise PasswordHashingBusy()
+
+        # The slot is freed when the hash really finishes, even if the request gave up on it
+        future.add_done_callback(self._release)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            self._count('timeouts')
+            raise PasswordHashingBusy()
+        except BrokenProcessPool:
+            self._executor = None
+            raise PasswordHashingBusy()
+
+
+def get_password_hasher():
+    """Get the password hasher of the current application"""
+    return current_app.extensions['password_hasher']
+
+
+def hashing_busy_response():
+    """503 response with Retry-After when the hashing pool is full"""
+    response = jsonify({'error': 'Too many concurrent password checks, try again shortly'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(current_app.config['PASSWORD_HASH_RETRY_AFTER'])
+    return response
@@ -0,0 +1,73 @@
+from datetime import datetime
+from itertools import combinations
+from sqlalchemy import select, func, tuple_
+from app import db
+from app.models import AccessLog
+from app.utils.access_log_queries import select_logs
+
+# Filters accepted by list_access_logs, as conditions with representative values
+_NOW = datetime(2025, 1, 1)
+LOG_FILTERS = {
+    'success': AccessLog.success == True,  # noqa: E712
+    'user_id': AccessLog.user_id == 1,
+    'door_id': AccessLog.door_id == 1,
+    'device_id': AccessLog.device_id == 1,
+    'from': AccessLog.timestamp >= _NOW,
+    'to': AccessLog.timestamp <= _NOW,
+}
+
+
+def explain(stmt):
+    """SQLite EXPLAIN QUERY PLAN of a statement, as a list of step descriptions"""
+    compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}'))
+    return [row[-1] for row in rows]
+
+
+def plan_problems(steps):
+    """Full table scans of access_logs and temporary sorts found in a plan"""
+    problems = []
+
+    for step in steps:
+        if step.startswith('SCAN access_logs') and 'INDEX' not in step:
+            problems.append(step)
+        elif 'USE TEMP B-TREE' in step:
+            problems.append(step)
+
+    return problems
+
+
+def access_log_queries():
+    """
+    Every access log query shape served by the API: each filter combination as an
+    offset page, a cursor page and a count (the unfiltered count is a scan by nature)
+    Yields (name, statement)
+    """
+    cursor_condition = tuple_(AccessLog.timestamp, AccessLog.id) < tuple_(_NOW, 1)
+
+    for size in range(len(LOG_FILTERS) + 1):
+        for names in combinations(LOG_FILTERS, size):
+            conditions = [LOG_FILTERS[name] for name in names]
+            label = '+'.join(names) or 'unfiltered'
+
+            yield f'{label} page', select_logs(*conditions).limit(50).offset(50)
+            yield f'{label} cursor page', select_logs(*conditions, cursor_condition).limit(51)
+
+            if conditions:
+                yield f'{label} count', (
+                    select(func.count()).select_from(AccessLog).where(*conditions)
+                )
+
+
+def check_access_log_plans():
+    """
+    Explain every access log query shape
+    Returns a list of (name, steps, problems)
+    """
+    results = []
+
+    for name, stmt in access_log_queries():
+        steps = explain(stmt)
+        results.append((name, steps, plan_problems(steps)))
+
+    return results
@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, delete, exists, func
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import (
+    AccessLog, AccessLogArchive, AccessLogIdempotencyKey, PairingSession, DoorAclChange
+)
+
+logger = logging.getLogger(__name__)
+
+
+def retention_policies(now=None):
+    """
+    (name, model, condition) of rows that are due for deletion
+    A policy whose retention setting is 0 is disabled and left out
+    """
+    config = current_app.config
+    now = now or datetime.now()
+    policies = []
+
+    if config['ACCESS_LOG_RETENTION_DAYS']:
+        cutoff = now - timedelta(days=config['ACCESS_LOG_RETENTION_DAYS'])
+        # Like archival, never remove the newest row so SQLite cannot reuse ids
+        newest = select(func.max(AccessLog.id)).scalar_subquery()
+        policies.append(('access_logs', AccessLog, db.and_(
+            AccessLog.timestamp < cutoff,
+            AccessLog.id < newest
+        )))
+
+    if config['PAIRING_SESSION_RETENTION_MINUTES']:
+        # Pairing sessions are stored in UTC
+        cutoff = datetime.utcnow() - timedelta(minutes=config['PAIRING_SESSION_RETENTION_MINUTES'])
+        policies.append(('pairing_sessions', PairingSession, PairingSession.expires_at < cutoff))
+
+    if config['IDEMPOTENCY_KEY_RETENTION_DAYS']:
+        cutoff = now - timedelta(days=config['IDEMPOTENCY_KEY_RETENTION_DAYS'])
+        policies.append((
+            'access_log_idempotency_keys',
+            AccessLogIdempotencyKey,
+            AccessLogIdempotencyKey.created_at < cutoff
+        ))
+
+    if config['DOOR_ACL_CHANGE_RETENTION_DAYS']:
+        # Only changes superseded by a newer change of the same device at the same door:
+        # deltas and event streams send the last change per device, so they are unaffected
+        cutoff = now - timedelta(days=config['DOOR_ACL_CHANGE_RETENTION_DAYS'])
+        newer = aliased(DoorAclChange)
+        policies.append(('door_acl_changes', DoorAclChange, db.and_(
+            DoorAclChange.created_at < cutoff,
+            exists().where(
+                newer.door_id == DoorAclChange.door_id,
+                newer.device_id == DoorAclChange.device_id,
+                newer.id > DoorAclChange.id
+            )
+        )))
+
+    return policies
+
+
+def prune_rows(model, condition, chunk_size=None, pause_ms=None):
+    """
+    Delete rows of model matching condition in primary key ranges of at most chunk_size rows
+    Each chunk is its own short transaction, followed by a pause, so other writers
+    (door unlocks on SQLite in particular) never wait long for the database
+    Returns the number of rows deleted
+    """
+    chunk_size = chunk_size or current_app.config['RETENTION_CHUNK_SIZE']
+    pause = (current_app.config['RETENTION_CHUNK_PAUSE_MS'] if pause_ms is None else pause_ms) / 1000
+
+    table = model.__table__
+    pk = table.primary_key.columns[0]
+    removed = 0
+    last = None
+
+    while True:
+        query = select(pk).where(condition).order_by(pk).limit(chunk_size)
+        if last is not None:
+            query = query.where(pk > last)
+
+        ids = db.session.execute(query).scalars().all()
+
+        if not ids:
+            break
+
+        result = db.session.execute(delete(table).where(pk >= ids[0], pk <= ids[-1], condition))
+        db.session.commit()
+        removed += result.rowcount
+        last = ids[-1]
+
+        if len(ids) < chunk_size:
+            break
+
+        time.sleep(pause)
+
+    return removed
+
+
+def prune_archives(now=None):
+    """
+    Delete archive files (and their catalog rows) of months entirely older than
+    ACCESS_LOG_RETENTION_DAYS; returns the number of access logs they held
+    """
+    from app.utils.access_log_archive import get_archive_dir
+
+    days = current_app.config['ACCESS_LOG_RETENTION_DAYS']
+    if not days:
+        return 0
+
+    cutoff = (now or datetime.now()) - timedelta(days=days)
+    removed = 0
+
+    for archive in AccessLogArchive.query.filter(AccessLogArchive.last_timestamp < cutoff).all():
+        path = os.path.join(get_archive_dir(), archive.filename)
+        removed += archive.row_count
+
+        # Drop the catalog row first: a file without a row is never read
+        db.session.delete(archive)
+        db.session.commit()
+
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    return removed
+
+
+def run_retention(now=None):
+    """
+    Apply every retention policy
+    Returns a list of (name, rows removed, seconds spent)
+    """
+    report = []
+
+    for name, model, condition in retention_policies(now):
+        started = time.monotonic()
+        removed = prune_rows(model, condition)
+        report.append((name, removed, round(time.monotonic() - started, 3)))
+
+    started = time.monotonic()
+    removed = prune_archives(now)
+    report.append(('access_log_archives', removed, round(time.monotonic() - started, 3)))
+
+    return report
+
+
+def start_retention_thread(app):
+    """Run the retention policies every RETENTION_INTERVAL_MINUTES in a daemon thread"""
+    interval = app.config['RETENTION_INTERVAL_MINUTES'] * 60
+
+    def run():
+        while True:
+            time.sleep(interval)
+
+            with app.app_context():
+                try:
+                    for name, removed, seconds in run_retention():
+                        if removed:
+                            logger.info('Retention: %d rows removed from %s in %.1fs', removed, name, seconds)
+                except Exception:
+                    db.session.rollback()
+                    logger.exception('Retention run failed')
+                finally:
+                    db.session.remove()
+
+    thread = threading.Thread(target=run, name='retention', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,19 @@
+import json
+
+
+def format_sse(data, event=None, event_id=None):
+    """Encode one server-sent event; data is serialized as JSON"""
+    lines = []
+
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event:
+        lines.append(f'event: {event}')
+
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_comment(text):
+    """Encode an SSE comment line, used as keepalive"""
+    return f': {text}\n\n'
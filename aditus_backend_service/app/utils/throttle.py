@@ -0,0 +1,108 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from flask import current_app, jsonify
+
+
+class DeniedAttemptThrottle:
+    """
+    Sliding-window counter of denied access attempts per (door, user, device)
+    Once a key collects limit denials within window seconds, requests for it are
+    refused until the oldest of those denials leaves the window
+    Keeps at most max_keys keys, dropping the least recently denied ones
+    """
+
+    def __init__(self, limit=10, window=60, max_keys=10000):
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self.throttled = 0
+        self.suppressed_logs = 0
+        self._denials = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _recent(self, key, now):
+        """Denial times of key still inside the window (caller holds the lock)"""
+        denials = self._denials.get(key)
+        if denials is None:
+            return None
+
+        while denials and denials[0] <= now - self.window:
+            denials.popleft()
+
+        if not denials:
+            del self._denials[key]
+            return None
+
+        return denials
+
+    def retry_after(self, key):
+        """Seconds until key may try again, or None if it is not throttled"""
+        if not self.limit:
+            return None
+
+        now = time.monotonic()
+
+        with self._lock:
+            denials = self._recent(key, now)
+
+            if denials is None or len(denials) < self.limit:
+                return None
+
+            self.throttled += 1
+            # The window drops below the limit when this denial expires
+            expires = denials[len(denials) - self.limit] + self.window
+            return max(1, math.ceil(expires - now))
+
+    def record_denied(self, key):
+        if not self.limit:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            denials = self._recent(key, now)
+
+            if denials is None:
+                denials = self._denials[key] = deque(maxlen=self.limit)
+
+            denials.append(now)
+            self._denials.move_to_end(key)
+
+            while len(self._denials) > self.max_keys:
+                self._denials.popitem(last=False)
+
+    def record_suppressed(self):
+        """Count a denied access log that was refused instead of stored"""
+        with self._lock:
+            self.suppressed_logs += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'keys': len(self._denials),
+                'max_keys': self.max_keys,
+                'limit': self.limit,
+                'window': self.window,
+                'throttled': self.throttled,
+                'suppressed_logs': self.suppressed_logs
+            }
+
+
+def get_denied_attempt_throttle():
+    """Get the denied attempt throttle of the current application"""
+    return current_app.extensions['denied_throttle']
+
+
+def throttle_key(door_id, user_id, device_id):
+    """Throttle key of a request; ids are compared as strings as they arrive in JSON"""
+    return tuple(None if value is None else str(value) for value in (door_id, user_id, device_id))
+
+
+def throttled_response(retry_after, body=None):
+    """429 response with Retry-After for a throttled key"""
+    response = jsonify(body or {'error': 'Too many denied attempts, try again later'})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
@@ -0,0 +1,93 @@
+from sqlalchemy import select, union_all, literal, exists, and_
+from app import db
+from app.models import (
+    Device,
+    Door,
+    Group,
+    user_groups,
+    user_door_access,
+    user_door_exceptions,
+    group_door_access,
+    group_door_exceptions
+)
+
+# Door lists of the sensitive profile, in the order they are serialized
+DOOR_LISTS = ('direct_door_access', 'door_exceptions', 'group_door_access', 'group_door_exceptions')
+
+
+def _door_list(name, stmt):
+    """Tag a (door_id) select so several door lists can share one round trip"""
+    return stmt.add_columns(literal(name).label('list_name'))
+
+
+def get_profile_details(user_id):
+    """
+    Sensitive part of a user's profile (groups, devices, door access and counts)
+    Built from three queries whatever the number of groups, devices or doors
+    """
+    groups = db.session.execute(
+        select(Group.id, Group.name)
+        .join(user_groups, user_groups.c.group_id == Group.id)
+        .where(user_groups.c.user_id == user_id)
+        .order_by(Group.id)
+    ).all()
+
+    devices = db.session.execute(
+        select(Device.id, Device.name, Device.public_key)
+        .where(Device.owner_id == user_id)
+        .order_by(Device.id)
+    ).all()
+
+    # A group grant only counts if that same group is not blacklisted from the door
+    group_grants = (
+        select(group_door_access.c.door_id)
+        .join(user_groups, user_groups.c.group_id == group_door_access.c.group_id)
+        .where(user_groups.c.user_id == user_id)
+        .where(~exists().where(and_(
+            group_door_exceptions.c.group_id == group_door_access.c.group_id,
+            group_door_exceptions.c.door_id == group_door_access.c.door_id
+        )))
+    )
+    group_denials = (
+        select(group_door_exceptions.c.door_id)
+        .join(user_groups, user_groups.c.group_id == group_door_exceptions.c.group_id)
+        .where(user_groups.c.user_id == user_id)
+    )
+
+    lists = union_all(
+        _door_list('direct_door_access', select(user_door_access.c.door_id)
+                   .where(user_door_access.c.user_id == user_id)),
+        _door_list('door_exceptions', select(user_door_exceptions.c.door_id)
+                   .where(user_door_exceptions.c.user_id == user_id)),
+        _door_list('group_door_access', group_grants),
+        _door_list('group_door_exceptions', group_denials)
+    ).subquery()
+
+    door_rows = db.session.execute(
+        select(lists.c.list_name, Door.id, Door.name, Door.location)
+        .join(Door, Door.id == lists.c.door_id)
+        .distinct()
+        .order_by(lists.c.list_name, Door.id)
+    ).all()
+
+    door_lists = {name: [] for name in DOOR_LISTS}
+    for list_name, door_id, name, location in door_rows:
+        door_lists[list_name].append({'id': door_id, 'name': name, 'location': location})
+
+    data = {
+        'groups': [{'id': group_id, 'name': name} for group_id, name in groups],
+        'devices': [
+            {'id': device_id, 'name': name, 'public_key': public_key}
+            for device_id, name, public_key in devices
+        ]
+    }
+    data.update(door_lists)
+
+    # Total counts
+    data['device_count'] = len(devices)
+    data['group_count'] = len(groups)
+    data['total_door_access_count'] = (
+        len(door_lists['direct_door_access']) + len(door_lists['group_door_access'])
+    )
+
+    return data
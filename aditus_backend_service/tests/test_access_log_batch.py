@@ -0,0 +1,63 @@
+import pytest
+from app import create_app, db
+from app.models import AccessLog, Door, User
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def upload(app, **fields):
+    """POST one event to /api/access-logs/batch; returns its result"""
+    admin = User.query.filter_by(role='admin').first()
+    door = Door(name='Lab A')
+    db.session.add(door)
+    db.session.commit()
+
+    event = {
+        'idempotency_key': 'event-1',
+        'user_id': admin.id,
+        'door_id': door.id,
+        'success': False,
+        'timestamp': '2025-01-26T14:30:00',
+        **fields
+    }
+    response = app.test_client().post('/api/access-logs/batch', json={
+        'api_key': app.config['ESP32_API_KEY'],
+        'events': [event]
+    })
+
+    assert response.status_code == 200
+    return response.get_json()['results'][0]
+
+
+def test_stores_valid_event(app):
+    result = upload(app, failure_reason='no_permission')
+
+    assert result['status'] == 'created'
+    log = AccessLog.query.one()
+    assert log.success is False
+    assert log.failure_reason == 'no_permission'
+
+
+@pytest.mark.parametrize('success', ['false', 0, 1, 'true'])
+def test_rejects_non_boolean_success(app, success):
+    result = upload(app, success=success)
+
+    assert result == {'idempotency_key': 'event-1', 'status': 'rejected', 'error': 'success must be a boolean'}
+    assert AccessLog.query.count() == 0
+
+
+@pytest.mark.parametrize('name', ['action', 'failure_reason', 'device_info'])
+@pytest.mark.parametrize('value', [['x'], {'x': 1}, 5, True])
+def test_rejects_non_string_values(app, name, value):
+    result = upload(app, **{name: value})
+
+    assert result == {'idempotency_key': 'event-1', 'status': 'rejected', 'error': f'{name} must be a string'}
+    assert AccessLog.query.count() == 0
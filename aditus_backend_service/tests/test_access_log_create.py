@@ -0,0 +1,44 @@
+import pytest
+from app import create_app, db
+from app.models import AccessLog, Door, User
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def post_log(app, success):
+    admin = User.query.filter_by(role='admin').first()
+    door = Door(name='Lab A')
+    db.session.add(door)
+    db.session.commit()
+
+    return app.test_client().post('/api/access-logs/', json={
+        'api_key': app.config['ESP32_API_KEY'],
+        'user_id': admin.id,
+        'door_id': door.id,
+        'success': success
+    })
+
+
+@pytest.mark.parametrize('success', [True, False])
+def test_stores_boolean_success(app, success):
+    response = post_log(app, success)
+
+    assert response.status_code == 201
+    assert AccessLog.query.one().success is success
+
+
+@pytest.mark.parametrize('success', ['false', 'true', 0, 1])
+def test_rejects_non_boolean_success(app, success):
+    response = post_log(app, success)
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'success must be a boolean'}
+    assert AccessLog.query.count() == 0
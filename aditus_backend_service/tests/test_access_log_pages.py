@@ -0,0 +1,46 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def get(app, url):
+    admin = User.query.filter_by(role='admin').first()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+    return app.test_client().get(url, headers=headers)
+
+
+ENDPOINTS = ['/api/access-logs/', '/api/access-logs/my-logs', '/api/access-logs/users/1']
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+@pytest.mark.parametrize('query', ['limit=0&cursor=', 'limit=0', 'limit=501', 'limit=-1', 'limit=abc&cursor='])
+def test_rejects_invalid_limit(app, endpoint, query):
+    response = get(app, f'{endpoint}?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'limit must be an integer between 1 and 500'}
+
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+@pytest.mark.parametrize('query', ['offset=-1', 'offset=x'])
+def test_rejects_invalid_offset(app, endpoint, query):
+    response = get(app, f'{endpoint}?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'offset must be a non-negative integer'}
+
+
+@pytest.mark.parametrize('query', ['limit=1&cursor=', 'limit=500&offset=0', ''])
+def test_accepts_valid_pages(app, query):
+    assert get(app, f'/api/access-logs/?{query}').status_code == 200
@@ -0,0 +1,41 @@
+import pytest
+from app import create_app, db
+from app.models import AccessLog
+from app.utils.access_log_queries import select_logs
+from app.utils.query_plans import LOG_FILTERS, check_access_log_plans, explain, plan_problems
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # A fresh on-disk database, built from the models and ensure_indexes like a new install
+    monkeypatch.setattr('app.config.TestingConfig.SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path}/plans.db')
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def test_every_filter_combination_is_checked(app):
+    names = [name for name, _, _ in check_access_log_plans()]
+    combinations = 2 ** len(LOG_FILTERS)
+
+    assert combinations == 64
+    assert sum(name.endswith(' cursor page') for name in names) == combinations
+    assert sum(name.endswith(' page') and not name.endswith(' cursor page') for name in names) == combinations
+    # The unfiltered count is a scan by nature and is not checked
+    assert sum(name.endswith(' count') for name in names) == combinations - 1
+
+
+def test_access_log_queries_use_indexes(app):
+    failures = {name: problems for name, _, problems in check_access_log_plans() if problems}
+
+    assert failures == {}
+
+
+def test_plan_problems_flags_scans_and_temp_sorts(app):
+    # ip_address has no index, and ordering by it needs a temporary B-tree
+    steps = explain(select_logs(AccessLog.ip_address == '10.0.0.1').order_by(None).order_by(AccessLog.ip_address))
+
+    assert plan_problems(steps)
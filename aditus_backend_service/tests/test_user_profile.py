@@ -0,0 +1,110 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Device, Door, Group
+
+
+def legacy_profile(user):
+    """Sensitive profile as the relationship-walking serializer used to build it"""
+    def doors(items):
+        return sorted(({'id': d.id, 'name': d.name, 'location': d.location} for d in items),
+                      key=lambda door: door['id'])
+
+    group_doors = {
+        door
+        for group in user.groups
+        for door in group.doors
+        if group not in door.exception_groups
+    }
+    group_exception_doors = {door for group in user.groups for door in group.exception_doors}
+
+    return {
+        'groups': sorted(({'id': g.id, 'name': g.name} for g in user.groups), key=lambda g: g['id']),
+        'devices': sorted(({'id': d.id, 'name': d.name, 'public_key': d.public_key} for d in user.devices),
+                          key=lambda d: d['id']),
+        'direct_door_access': doors(user.direct_door_access),
+        'door_exceptions': doors(user.door_exceptions),
+        'group_door_access': doors(group_doors),
+        'group_door_exceptions': doors(group_exception_doors),
+        'device_count': user.devices.count(),
+        'group_count': user.groups.count(),
+        'total_door_access_count': user.direct_door_access.count() + len(group_doors)
+    }
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def make_user(name, size):
+    """User with size groups, each granted and denied its own doors, plus direct grants and exceptions"""
+    user = User(email=f'{name}@example.com', full_name=name, role='user', password_hash='-')
+    db.session.add(user)
+
+    for n in range(size):
+        group = Group(name=f'{name}-group-{n}')
+        granted, denied, direct, excepted = (
+            Door(name=f'{name}-{kind}-{n}', location=f'Building {n}')
+            for kind in ('granted', 'denied', 'direct', 'excepted')
+        )
+        db.session.add_all([group, granted, denied, direct, excepted])
+
+        user.groups.append(group)
+        group.doors.append(granted)
+        group.doors.append(denied)
+        group.exception_doors.append(denied)
+        user.direct_door_access.append(direct)
+        user.door_exceptions.append(excepted)
+        user.devices.append(Device(name=f'{name}-phone-{n}', public_key=f'key-{name}-{n}'))
+
+    db.session.commit()
+    return user.id
+
+
+def get_user_counting_queries(app, user_id):
+    """GET /api/users/<id> as the admin; returns (user JSON, number of SQL statements)"""
+    admin = User.query.filter_by(role='admin').first()
+    headers = {'Authorization': f'Bearer {create_access_token(identity=str(admin.id))}'}
+    db.session.remove()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = app.test_client().get(f'/api/users/{user_id}', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert response.status_code == 200
+    return response.get_json()['user'], len(statements)
+
+
+def test_profile_query_count_does_not_grow_with_memberships(app):
+    small = make_user('small', 1)
+    large = make_user('large', 20)
+
+    _, small_queries = get_user_counting_queries(app, small)
+    _, large_queries = get_user_counting_queries(app, large)
+
+    assert small_queries == large_queries
+
+
+@pytest.mark.parametrize('size', [1, 20])
+def test_profile_matches_legacy_serializer(app, size):
+    user_id = make_user('user', size)
+
+    data, _ = get_user_counting_queries(app, user_id)
+    expected = legacy_profile(db.session.get(User, user_id))
+
+    assert {key: data[key] for key in expected} == expected
+    assert data['group_door_access'] and data['group_door_exceptions']